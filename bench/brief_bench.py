@@ -0,0 +1,207 @@
+"""End-to-end /brief benchmark against the fake HubSpot across account sizes.
+
+For each account shape in the matrix this builds a synthetic portal with
+fake_hubspot, routes main's HubSpot client to it in-process, and requests
+/brief cold (brief, contact and company caches cleared) ``--runs`` times.
+Per shape it records:
+
+    calls        upstream HubSpot calls per brief, counted by the fake (retries included)
+    calls_by     the same, split by endpoint
+    wall p50/p99 /brief wall time in ms
+    peak_kib     peak Python heap during one brief (tracemalloc, separate run)
+
+The stage map and the query planner's association counts are warmed once
+per shape, so the count is for a company the planner has seen before. HubSpot's rate limits are lifted unless ``--paced``, so wall time
+measures our own work plus injected ``--latency-ms`` rather than pacing.
+
+Results go to ``--out`` as JSON. With a baseline (``--baseline``, default
+bench/brief_baseline.json) any shape whose call count goes up at all, or whose
+p50 or peak memory grows past ``--tolerance`` / ``--memory-tolerance``, is
+flagged and the exit status is 1. Call counts are deterministic for a given
+shape; wall time is noisy, hence the looser default tolerance.
+
+Run from the repo root:
+
+    python bench/brief_bench.py                      # full matrix, compare with baseline
+    python bench/brief_bench.py --shapes small,medium --runs 3
+    python bench/brief_bench.py --update-baseline    # store this run as the new baseline
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SHAPES = {
+    # name: (contacts, engagements, deals)
+    "small": (10, 200, 10),
+    "medium": (50, 2_000, 60),
+    "large": (200, 10_000, 200),
+    "xl": (500, 50_000, 500),
+}
+DEFAULT_BASELINE = os.path.join(ROOT, "bench", "brief_baseline.json")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark /brief across account sizes.")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help=f"comma-separated subset of {', '.join(SHAPES)}")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency the fake adds to every call")
+    parser.add_argument("--paced", action="store_true", help="keep main's HubSpot rate limits in force")
+    parser.add_argument("--out", default=os.path.join(ROOT, "bench", "brief_results.json"))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative growth in p50 wall time")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed relative growth in peak memory")
+    parser.add_argument("--update-baseline", action="store_true")
+    return parser.parse_args()
+
+
+args = parse_args()
+if not args.paced:
+    for name in ("HUBSPOT_RATE_LIMIT", "HUBSPOT_SEARCH_RATE_LIMIT"):
+        os.environ[name] = "1000000"
+os.environ.setdefault("HUBSPOT_TOKEN", "bench")
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import main
+import httpx
+
+import fake_hubspot
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    rank = q * (len(ordered) - 1)
+    lo = int(rank)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+def reset_caches():
+    for cache in (main.brief_cache, main.contact_cache, main.company_cache):
+        cache.clear()
+
+
+async def one_brief(client: httpx.AsyncClient, fake, email: str, domain: str) -> tuple:
+    reset_caches()
+    fake.state.calls.clear()
+    started = time.perf_counter()
+    response = await client.get("/brief", params={"email": email, "domain": domain})
+    elapsed = (time.perf_counter() - started) * 1000
+    response.raise_for_status()
+    calls = dict(fake.state.calls)
+    return elapsed, calls.pop("total", 0), calls
+
+
+async def bench_shape(name: str, runs: int, latency_ms: float) -> dict:
+    contacts, engagements, deals = SHAPES[name]
+    shape = fake_hubspot.AccountShape(contacts=contacts, engagements=engagements, deals=deals, domain=f"{name}.example")
+    fake = fake_hubspot.create_app(shape, fake_hubspot.Faults(latency_ms=latency_ms))
+    portal = fake.state.portal
+    email = next(c["properties"]["email"] for c in portal.objects["contacts"].values() if c["properties"]["email"])
+
+    # Every shape's company has the same id; the planner's counts must come from this one's warm-up.
+    main.association_counts.clear()
+    main.company_ids.clear()
+    main.hubspot = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake-hubspot")
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://brief", timeout=None)
+    async with client, main.hubspot:
+        await main.refresh_stage_label_map()
+        await one_brief(client, fake, email, shape.domain)  # warm-up
+
+        walls, counts = [], set()
+        for _ in range(runs):
+            wall, calls, calls_by = await one_brief(client, fake, email, shape.domain)
+            walls.append(wall)
+            counts.add(calls)
+
+        tracemalloc.start()
+        await one_brief(client, fake, email, shape.domain)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    if len(counts) > 1:
+        print(f"  ! {name}: call count varied between runs: {sorted(counts)}", file=sys.stderr)
+    return {
+        "shape": {"contacts": contacts, "engagements": engagements, "deals": deals},
+        "runs": runs,
+        "calls": max(counts),
+        "calls_by": dict(sorted(calls_by.items())),
+        "wall_ms": {
+            "p50": round(percentile(walls, 0.50), 1),
+            "p99": round(percentile(walls, 0.99), 1),
+            "min": round(min(walls), 1),
+            "mean": round(statistics.fmean(walls), 1),
+        },
+        "peak_kib": round(peak / 1024),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, memory_tolerance: float) -> list:
+    """Regressions as human-readable strings; empty when everything is within budget."""
+    problems = []
+    for name, current in results["shapes"].items():
+        base = baseline.get("shapes", {}).get(name)
+        if base is None:
+            continue
+        if current["calls"] > base["calls"]:
+            problems.append(f"{name}: upstream calls {base['calls']} -> {current['calls']}")
+        if current["wall_ms"]["p50"] > base["wall_ms"]["p50"] * (1 + tolerance):
+            problems.append(f"{name}: p50 {base['wall_ms']['p50']} ms -> {current['wall_ms']['p50']} ms")
+        if current["peak_kib"] > base["peak_kib"] * (1 + memory_tolerance):
+            problems.append(f"{name}: peak memory {base['peak_kib']} KiB -> {current['peak_kib']} KiB")
+    return problems
+
+
+def main_():
+    names = [s.strip() for s in args.shapes.split(",") if s.strip()]
+    unknown = [n for n in names if n not in SHAPES]
+    if unknown:
+        sys.exit(f"unknown shapes: {', '.join(unknown)}")
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "latency_ms": args.latency_ms,
+        "paced": args.paced,
+        "shapes": {},
+    }
+    print(f"{'shape':<8} {'calls':>6} {'p50 ms':>9} {'p99 ms':>9} {'peak KiB':>9}")
+    for name in names:
+        r = asyncio.run(bench_shape(name, args.runs, args.latency_ms))
+        results["shapes"][name] = r
+        print(f"{name:<8} {r['calls']:>6} {r['wall_ms']['p50']:>9.1f} {r['wall_ms']['p99']:>9.1f} {r['peak_kib']:>9}")
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {os.path.relpath(args.out)}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline updated: {os.path.relpath(args.baseline)}")
+        return
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against (run with --update-baseline to store one)")
+        return
+    with open(args.baseline) as f:
+        problems = compare(results, json.load(f), args.tolerance, args.memory_tolerance)
+    for p in problems:
+        print(f"REGRESSION {p}")
+    if problems:
+        sys.exit(1)
+    print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,90 @@
+"""Cost of per-engagement logging on the engagement merge hot path.
+
+Feeds a synthetic 5,000-engagement account (with realistic multi-KB email
+bodies) through merge_top_k under four logging setups and reports the median
+wall time of each:
+
+    legacy_print   the old ``print(f"... META: {meta}")`` per engagement
+    debug_off      structured logging at INFO (the production default)
+    debug_on       structured logging at DEBUG, every engagement
+    debug_sampled  structured logging at DEBUG, 1% sampled
+
+Run from the repo root:  DEBUG_INIT=true python bench/logging_overhead.py
+"""
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DEBUG_INIT", "true")
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import main
+from logutil import configure_logging
+
+ENGAGEMENTS = 5000
+RUNS = 7
+BODY = "<p>" + "Thanks for the call today, following up on pricing and rollout. " * 80 + "</p>"
+
+
+def synthetic_engagements(n: int) -> list:
+    now = 1_760_000_000_000
+    return [
+        {
+            "engagement": {"id": i, "type": "EMAIL" if i % 3 else "CALL", "timestamp": now - i * 60_000},
+            "metadata": {"subject": f"Re: proposal #{i}", "body": BODY, "from": {"email": "rep@example.com"}},
+        }
+        for i in range(n)
+    ]
+
+
+async def feed(items: list, legacy_print: bool):
+    for e in items:
+        if legacy_print:
+            eng, meta = e["engagement"], e["metadata"]
+            print(f"📌 [COMPANY] ID: {eng.get('id')} TYPE: {eng.get('type','').lower()} META: {meta}")
+        yield e
+
+
+async def run_once(items: list, legacy_print: bool) -> float:
+    top = main.TopK(20)
+    f = main.EngagementFeed("COMPANY", feed(items, legacy_print), ("email", "call"))
+    started = time.perf_counter()
+    await main.merge_top_k(top, 0, f)
+    return time.perf_counter() - started
+
+
+def measure(items: list, level: str, sample: float = 1.0, legacy_print: bool = False) -> float:
+    sink = open(os.devnull, "w")
+    configure_logging(level, stream=sink)
+    main.ENGAGEMENT_LOG_SAMPLE = sample
+    timings = []
+    with contextlib.redirect_stdout(sink):
+        for _ in range(RUNS):
+            timings.append(asyncio.run(run_once(items, legacy_print)))
+    sink.close()
+    return statistics.median(timings)
+
+
+def main_():
+    items = synthetic_engagements(ENGAGEMENTS)
+    results = {
+        "legacy_print": measure(items, "INFO", legacy_print=True),
+        "debug_off": measure(items, "INFO"),
+        "debug_on": measure(items, "DEBUG"),
+        "debug_sampled": measure(items, "DEBUG", sample=0.01),
+    }
+    base = results["debug_off"]
+    print(f"{ENGAGEMENTS} engagements, median of {RUNS} runs")
+    for name, seconds in results.items():
+        print(f"  {name:<14} {seconds * 1000:8.1f} ms  ({seconds / base:5.2f}x debug_off)")
+    logging.shutdown()
+
+
+if __name__ == "__main__":
+    main_()
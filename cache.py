@@ -0,0 +1,121 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class _Negative:
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: Exception):
+        self.exc = exc
+
+
+class TTLCache:
+    """Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Lookups that fail in an expected way (e.g. a 404) can be negative-cached
+    for a shorter ``negative_ttl`` so retries don't hit upstream again.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float = 0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        if value is None or isinstance(value, _Negative):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Like ``get`` but leaves hit/miss counts and LRU order alone."""
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= self.clock() or isinstance(entry[1], _Negative):
+            return default
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (self.clock() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def set_negative(self, key: Hashable, exc: Exception):
+        if self.negative_ttl > 0:
+            self.set(key, _Negative(exc), self.negative_ttl)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        if entry is None or isinstance(entry[1], _Negative):
+            return default
+        return entry[1]
+
+    def items(self):
+        """Live (key, value) pairs, skipping expired and negative entries. Doesn't touch LRU order."""
+        now = self.clock()
+        return [(k, v) for k, (exp, v) in self._data.items() if exp > now and not isinstance(v, _Negative)]
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable[Any]],
+        is_negative: Callable[[Exception], bool] = lambda exc: False,
+    ) -> Any:
+        """Return the cached value for ``key`` or await ``load()`` and cache it.
+
+        Exceptions for which ``is_negative`` is true are cached and re-raised
+        until ``negative_ttl`` runs out.
+        """
+        value = self._lookup(key)
+        if isinstance(value, _Negative):
+            self.negative_hits += 1
+            raise value.exc
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        try:
+            value = await load()
+        except Exception as exc:
+            if is_negative(exc):
+                self.set_negative(key, exc)
+            raise
+        self.set(key, value)
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,6 @@
+import os
+
+# main reads these at import time, and whichever test module imports it first wins
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("HUBSPOT_TOKEN", "test")
+os.environ.setdefault("HUBSPOT_CLIENT_SECRET", "test-secret")
@@ -0,0 +1,46 @@
+"""Per-request time budget shared by every HubSpot call a /brief makes.
+
+``start_deadline(seconds)`` sets the budget for the current context, and tasks
+spawned from there inherit it. ``remaining()`` is what's left of it, and
+``within_deadline()`` bounds an await by it, raising ``DeadlineExceeded`` once
+the budget is spent. With no deadline set, both are no-ops.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+_expires_at: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before this work finished."""
+
+
+def start_deadline(seconds: Optional[float]):
+    _expires_at.set(None if seconds is None else time.monotonic() + seconds)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget (may be negative), or None without one."""
+    expires_at = _expires_at.get()
+    return None if expires_at is None else expires_at - time.monotonic()
+
+
+@asynccontextmanager
+async def within_deadline():
+    left = remaining()
+    if left is None:
+        yield
+        return
+    if left <= 0:
+        raise DeadlineExceeded()
+    scope = asyncio.timeout(left)
+    try:
+        async with scope:
+            yield
+    except TimeoutError:
+        if scope.expired():
+            raise DeadlineExceeded() from None
+        raise
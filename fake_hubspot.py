@@ -0,0 +1,470 @@
+"""A local stand-in for the slice of the HubSpot API that main.py uses.
+
+The fake serves a synthetic portal built from an ``AccountShape`` (N contacts,
+M engagements, D deals on one company). It can also add latency, 429s and 5xx
+errors, so /brief can be benchmarked and load-tested without a HubSpot token.
+
+Endpoints served (same paths, parameters and response shapes as HubSpot):
+
+    POST /crm/v3/objects/{contacts,companies,deals,emails,calls}/search
+    POST /crm/v3/objects/{type}/batch/read
+    GET  /crm/v3/objects/{type}/{id}
+    GET  /crm/v3/objects/{type}/{id}/associations/{to_type}
+    POST /crm/v4/associations/{type}/{to_type}/batch/read
+    GET  /crm/v4/objects/{type}/{id}/associations/{to_type}
+    GET  /engagements/v1/engagements/associated/{company,contact}/{id}/paged
+    GET  /crm/v3/pipelines/deals
+
+plus ``GET /__fake/stats`` (calls per endpoint) and ``POST /__fake/reset``.
+
+Run standalone and point the service at it:
+
+    python fake_hubspot.py --contacts 200 --engagements 20000 --deals 300 --port 8001
+    HUBSPOT_API_BASE=http://127.0.0.1:8001 uvicorn main:app
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+SEARCH_RESULT_CAP = 10000
+V4_BATCH_LIMIT = 1000
+V4_PAGE_LIMIT = 500
+DAY_MS = 24 * 3600 * 1000
+
+# Object type names as they appear in association filters ("associations.contact") and v1 paths
+SINGULAR = {"contacts": "contact", "companies": "company", "deals": "deal", "emails": "email", "calls": "call"}
+PLURAL = {v: k for k, v in SINGULAR.items()}
+
+PIPELINE_STAGES = [
+    # id, label, isClosed, probability
+    ("appointmentscheduled", "Appointment Scheduled", "false", "0.2"),
+    ("qualifiedtobuy", "Qualified To Buy", "false", "0.4"),
+    ("presentationscheduled", "Presentation Scheduled", "false", "0.6"),
+    ("contractsent", "Contract Sent", "false", "0.9"),
+    ("closedwon", "Closed Won", "true", "1.0"),
+    ("closedlost", "Closed Lost", "true", "0.0"),
+    ("expansion", "Expansion Opportunity", "false", "0.5"),
+    ("resurrected", "Resurrected", "false", "0.3"),
+]
+
+
+@dataclass
+class AccountShape:
+    """One synthetic company and everything hanging off it."""
+    contacts: int = 25
+    engagements: int = 500
+    deals: int = 20
+    domain: str = "acme.example"
+    company_id: str = "1001"
+    seed: int = 7
+    history_days: int = 3 * 365
+    email_share: float = 0.45        # engagement type mix; the rest are notes, tasks and meetings
+    call_share: float = 0.25
+    contact_share: float = 0.6       # engagements also associated with one of the contacts
+    contact_only_share: float = 0.1  # ...of which this share is not associated with the company itself
+    missing_email_share: float = 0.1  # contacts without an email address
+    body_chars: int = 800
+
+
+@dataclass
+class Faults:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    rate_429: float = 0.0
+    error_rate: float = 0.0
+    # Emulate HubSpot's own limits (0 disables): calls per 10s, and search calls per second
+    rate_limit: int = 0
+    search_rate_limit: int = 0
+    paths: Optional[str] = None  # regex; faults only apply to matching paths
+
+
+def _iso(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _ms(value) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1000
+
+
+@dataclass
+class Portal:
+    objects: Dict[str, Dict[str, dict]] = field(default_factory=lambda: defaultdict(dict))
+    # assoc[from_type][from_id][to_type] -> ordered list of ids
+    assoc: dict = field(default_factory=lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(list))))
+    engagement_type: Dict[str, str] = field(default_factory=dict)
+
+    def add(self, object_type: str, object_id: str, properties: dict):
+        self.objects[object_type][object_id] = {"id": object_id, "properties": properties}
+
+    def associate(self, a_type: str, a_id: str, b_type: str, b_id: str):
+        self.assoc[a_type][a_id][b_type].append(b_id)
+        self.assoc[b_type][b_id][a_type].append(a_id)
+
+    def associated(self, from_type: str, from_id: str, to_type: str) -> List[str]:
+        return self.assoc[from_type].get(from_id, {}).get(to_type, [])
+
+
+def build_portal(shape: AccountShape, now_ms: Optional[int] = None) -> Portal:
+    rng = random.Random(shape.seed)
+    now_ms = now_ms or int(time.time() * 1000)
+    portal = Portal()
+    cid = shape.company_id
+    portal.add("companies", cid, {
+        "name": f"{shape.domain.split('.')[0].title()} Inc",
+        "domain": shape.domain,
+        "website": f"https://{shape.domain}",
+        "industry": "COMPUTER_SOFTWARE",
+        "lifecyclestage": "customer",
+        "2025_account_status": "Active",
+    })
+
+    contact_ids = []
+    for i in range(shape.contacts):
+        contact_id = str(2_000_000 + i)
+        contact_ids.append(contact_id)
+        email = None if rng.random() < shape.missing_email_share else f"person{i}@{shape.domain}"
+        portal.add("contacts", contact_id, {
+            "firstname": f"First{i}",
+            "lastname": f"Last{i}",
+            "email": email,
+            "jobtitle": rng.choice(["CTO", "VP Sales", "Engineer", "Buyer", ""]),
+        })
+        portal.associate("companies", cid, "contacts", contact_id)
+
+    for i in range(shape.deals):
+        deal_id = str(3_000_000 + i)
+        stage = rng.choice(PIPELINE_STAGES)[0]
+        # Mostly within the history window, some older, some closing in the future
+        close_ms = now_ms - int(rng.uniform(-0.1, 1.1) * shape.history_days * DAY_MS)
+        portal.add("deals", deal_id, {
+            "dealname": f"Deal {i}",
+            "amount": f"{rng.randint(1, 500) * 100:,}",
+            "dealstage": stage,
+            "closedate": _iso(close_ms),
+        })
+        portal.associate("deals", deal_id, "companies", cid)
+
+    body = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (shape.body_chars // 56 + 1))[:shape.body_chars]
+    for i in range(shape.engagements):
+        eng_id = str(4_000_000 + i)
+        roll = rng.random()
+        etype = "EMAIL" if roll < shape.email_share else "CALL" if roll < shape.email_share + shape.call_share else rng.choice(["NOTE", "TASK", "MEETING"])
+        ts = now_ms - int(rng.random() * shape.history_days * DAY_MS)
+        contact_id = rng.choice(contact_ids) if contact_ids and rng.random() < shape.contact_share else None
+        on_company = contact_id is None or rng.random() >= shape.contact_only_share
+        portal.engagement_type[eng_id] = etype
+        meta = (
+            {"subject": f"Subject {i}", "text": body, "html": f"<p>{body}</p>"} if etype == "EMAIL"
+            else {"title": f"Call {i}", "body": f"<p>Outcome {i}: {body[:120]}</p>", "status": "COMPLETED"} if etype == "CALL"
+            else {"body": f"<p>{etype.title()} {i}</p>"}
+        )
+        portal.add("engagements", eng_id, {"_timestamp": ts, "_meta": meta})
+        if etype in ("EMAIL", "CALL"):
+            v3_type = "emails" if etype == "EMAIL" else "calls"
+            props = {"hs_timestamp": _iso(ts)}
+            if etype == "EMAIL":
+                props.update(hs_email_subject=meta["subject"], hs_email_text=meta["text"], hs_body_preview=body[:200])
+            else:
+                props.update(hs_call_title=meta["title"], hs_call_body=meta["body"])
+            portal.add(v3_type, eng_id, props)
+        if on_company:
+            portal.associate("engagements", eng_id, "companies", cid)
+        if contact_id:
+            portal.associate("engagements", eng_id, "contacts", contact_id)
+        if etype in ("EMAIL", "CALL"):
+            v3_type = "emails" if etype == "EMAIL" else "calls"
+            if on_company:
+                portal.associate(v3_type, eng_id, "companies", cid)
+            if contact_id:
+                portal.associate(v3_type, eng_id, "contacts", contact_id)
+    return portal
+
+
+# —— Search ——
+
+def _matches(portal: Portal, object_type: str, obj: dict, f: dict) -> bool:
+    prop, op = f["propertyName"], f["operator"]
+    if prop.startswith("associations."):
+        linked = portal.associated(object_type, obj["id"], PLURAL.get(prop.split(".", 1)[1], prop.split(".", 1)[1]))
+        values = f.get("values") or [f.get("value")]
+        return any(str(v) in linked for v in values)
+    actual = obj["properties"].get(prop)
+    if op == "EQ":
+        return actual is not None and str(actual).lower() == str(f.get("value")).lower()
+    if op == "IN":
+        return actual is not None and str(actual).lower() in {str(v).lower() for v in f.get("values", [])}
+    if op == "HAS_PROPERTY":
+        return actual not in (None, "")
+    a, b = _ms(actual), _ms(f.get("value"))
+    if a is None or b is None:
+        return False
+    return {"GT": a > b, "GTE": a >= b, "LT": a < b, "LTE": a <= b}.get(op, False)
+
+
+def _candidates(portal: Portal, object_type: str, group: dict) -> List[dict]:
+    # Narrow by an association filter when there is one, like HubSpot's own index would
+    for f in group.get("filters", []):
+        if f["propertyName"].startswith("associations.") and f["operator"] in ("EQ", "IN"):
+            other = PLURAL.get(f["propertyName"].split(".", 1)[1])
+            ids = []
+            for v in f.get("values") or [f.get("value")]:
+                ids.extend(portal.associated(other, str(v), object_type))
+            store = portal.objects[object_type]
+            return [store[i] for i in ids if i in store]
+    return list(portal.objects[object_type].values())
+
+
+def search(portal: Portal, object_type: str, body: dict) -> dict:
+    groups = body.get("filterGroups") or [{"filters": []}]
+    hits = {}
+    for group in groups:
+        for obj in _candidates(portal, object_type, group):
+            if obj["id"] not in hits and all(_matches(portal, object_type, obj, f) for f in group.get("filters", [])):
+                hits[obj["id"]] = obj
+    results = list(hits.values())
+    for sort in reversed(body.get("sorts") or []):
+        prop = sort["propertyName"] if isinstance(sort, dict) else sort
+        desc = isinstance(sort, dict) and sort.get("direction") == "DESCENDING"
+        results.sort(key=lambda o: _ms(o["properties"].get(prop)) or 0, reverse=desc)
+    limit = min(int(body.get("limit", 10)), 200)
+    after = int(body.get("after") or 0)
+    if after >= SEARCH_RESULT_CAP:
+        return {"status": "error", "message": "paging past 10000 results is not supported", "_status": 400}
+    props = body.get("properties") or []
+    page = [{"id": o["id"], "properties": {p: o["properties"].get(p) for p in props}} for o in results[after:after + limit]]
+    out = {"total": len(results), "results": page}
+    if after + limit < min(len(results), SEARCH_RESULT_CAP):
+        out["paging"] = {"next": {"after": str(after + limit)}}
+    return out
+
+
+def v1_engagement(portal: Portal, eng_id: str) -> dict:
+    props = portal.objects["engagements"][eng_id]["properties"]
+    return {
+        "engagement": {"id": int(eng_id), "type": portal.engagement_type[eng_id], "timestamp": props["_timestamp"]},
+        "associations": {},
+        "metadata": props["_meta"],
+    }
+
+
+# —— App ——
+
+def endpoint_name(path: str) -> str:
+    """Stable label for call accounting, e.g. 'search:deals' or 'engagements_v1:contact'."""
+    m = re.match(r"/crm/v3/objects/(\w+)/search", path)
+    if m:
+        return f"search:{m[1]}"
+    m = re.match(r"/crm/v3/objects/(\w+)/batch/read", path)
+    if m:
+        return f"batch_read:{m[1]}"
+    m = re.match(r"/crm/v[34]/(?:objects|associations)/(\w+)/[^/]+/associations/(\w+)|/crm/v4/associations/(\w+)/(\w+)/batch/read", path)
+    if m:
+        return f"associations:{m[1] or m[3]}->{m[2] or m[4]}"
+    m = re.match(r"/engagements/v1/engagements/associated/(\w+)/", path)
+    if m:
+        return f"engagements_v1:{m[1]}"
+    if path.startswith("/crm/v3/pipelines"):
+        return "pipelines"
+    m = re.match(r"/crm/v3/objects/(\w+)/", path)
+    if m:
+        return f"object:{m[1]}"
+    return path
+
+
+def create_app(shape: AccountShape = AccountShape(), faults: Faults = Faults(), portal: Optional[Portal] = None) -> FastAPI:
+    app = FastAPI(title="Fake HubSpot", docs_url=None, redoc_url=None)
+    app.state.portal = portal or build_portal(shape)
+    app.state.faults = faults
+    app.state.calls = Counter()
+    app.state.windows = {"general": [0.0, 0], "search": [0.0, 0]}
+    fault_paths = re.compile(faults.paths) if faults.paths else None
+
+    def over_limit(bucket: str, limit: int, seconds: float) -> Optional[int]:
+        """Fixed-window counter; returns the remaining count, or None once the window is spent."""
+        window = app.state.windows[bucket]
+        now = time.monotonic()
+        if now - window[0] >= seconds:
+            window[0], window[1] = now, 0
+        window[1] += 1
+        return None if window[1] > limit else limit - window[1]
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        path = request.url.path
+        if path.startswith("/__fake"):
+            return await call_next(request)
+        app.state.calls[endpoint_name(path)] += 1
+        app.state.calls["total"] += 1
+        f = app.state.faults
+        applies = fault_paths is None or fault_paths.search(path)
+        if applies and (f.latency_ms or f.jitter_ms):
+            await asyncio.sleep(max(0.0, f.latency_ms + random.uniform(-f.jitter_ms, f.jitter_ms)) / 1000)
+        headers = {}
+        if f.search_rate_limit and path.endswith("/search") and over_limit("search", f.search_rate_limit, 1.0) is None:
+            app.state.calls["429"] += 1
+            return JSONResponse({"status": "error", "policyName": "SECONDLY"}, status_code=429, headers={"Retry-After": "1"})
+        if f.rate_limit and not path.endswith("/search"):
+            remaining = over_limit("general", f.rate_limit, 10.0)
+            if remaining is None:
+                app.state.calls["429"] += 1
+                return JSONResponse({"status": "error", "policyName": "TEN_SECONDLY_ROLLING"}, status_code=429)
+            headers = {
+                "X-HubSpot-RateLimit-Max": str(f.rate_limit),
+                "X-HubSpot-RateLimit-Remaining": str(remaining),
+                "X-HubSpot-RateLimit-Interval-Milliseconds": "10000",
+            }
+        if applies and f.rate_429 and random.random() < f.rate_429:
+            app.state.calls["429"] += 1
+            return JSONResponse({"status": "error", "policyName": "TEN_SECONDLY_ROLLING"}, status_code=429, headers={"Retry-After": "0.1"})
+        if applies and f.error_rate and random.random() < f.error_rate:
+            app.state.calls["5xx"] += 1
+            return JSONResponse({"status": "error", "message": "injected failure"}, status_code=502)
+        response = await call_next(request)
+        response.headers.update(headers)
+        return response
+
+    # Large payloads go out as JSONResponse directly: FastAPI's jsonable_encoder would otherwise
+    # dominate the fake's own CPU time and skew benchmarks of the service.
+    def reply(data: dict):
+        status = data.pop("_status", 200)
+        return JSONResponse(data, status_code=status)
+
+    @app.post("/crm/v3/objects/{object_type}/search")
+    async def object_search(object_type: str, request: Request):
+        return reply(search(app.state.portal, object_type, await request.json()))
+
+    @app.post("/crm/v3/objects/{object_type}/batch/read")
+    async def batch_read(object_type: str, request: Request):
+        body = await request.json()
+        store = app.state.portal.objects[object_type]
+        props = body.get("properties") or []
+        results = [
+            {"id": i["id"], "properties": {p: store[i["id"]]["properties"].get(p) for p in props}}
+            for i in body.get("inputs", [])[:100] if i["id"] in store
+        ]
+        return JSONResponse({"status": "COMPLETE", "results": results})
+
+    @app.get("/crm/v3/objects/{object_type}/{object_id}/associations/{to_type}")
+    async def list_associations(object_type: str, object_id: str, to_type: str, after: int = 0, limit: int = 500):
+        ids = app.state.portal.associated(object_type, object_id, to_type)
+        out = {"results": [{"id": i, "type": f"{SINGULAR.get(object_type)}_to_{SINGULAR.get(to_type)}"} for i in ids[after:after + limit]]}
+        if after + limit < len(ids):
+            out["paging"] = {"next": {"after": str(after + limit)}}
+        return out
+
+    def v4_page(object_type: str, object_id: str, to_type: str, after: int, limit: int) -> dict:
+        ids = app.state.portal.associated(object_type, object_id, to_type)
+        out = {"results": [
+            {"toObjectId": int(i), "associationTypes": [{"category": "HUBSPOT_DEFINED", "typeId": 1, "label": None}]}
+            for i in ids[after:after + limit]
+        ]}
+        if after + limit < len(ids):
+            out["paging"] = {"next": {"after": str(after + limit), "link": f"?after={after + limit}"}}
+        return out
+
+    @app.post("/crm/v4/associations/{object_type}/{to_type}/batch/read")
+    async def v4_batch_associations(object_type: str, to_type: str, request: Request):
+        inputs = (await request.json()).get("inputs", [])
+        if len(inputs) > V4_BATCH_LIMIT:
+            return JSONResponse({"status": "error", "message": f"at most {V4_BATCH_LIMIT} inputs"}, status_code=400)
+        results, missing = [], []
+        for i in inputs:
+            page = v4_page(object_type, str(i["id"]), to_type, 0, V4_PAGE_LIMIT)
+            if not page["results"]:
+                missing.append(str(i["id"]))
+                continue
+            results.append({"from": {"id": str(i["id"])}, "to": page["results"], **({"paging": page["paging"]} if "paging" in page else {})})
+        body = {"status": "COMPLETE", "results": results}
+        if missing:
+            # HubSpot answers 207 and lists sources without associations as errors
+            body["errors"] = [{"status": "error", "category": "OBJECT_NOT_FOUND", "context": {"fromObjectId": missing}}]
+        return JSONResponse(body, status_code=207 if missing else 200)
+
+    @app.get("/crm/v4/objects/{object_type}/{object_id}/associations/{to_type}")
+    async def v4_list_associations(object_type: str, object_id: str, to_type: str, after: int = 0, limit: int = V4_PAGE_LIMIT):
+        return JSONResponse(v4_page(object_type, object_id, to_type, after, min(limit, V4_PAGE_LIMIT)))
+
+    @app.get("/crm/v3/objects/{object_type}/{object_id}")
+    async def get_object(object_type: str, object_id: str, properties: str = ""):
+        obj = app.state.portal.objects[object_type].get(object_id)
+        if obj is None:
+            return JSONResponse({"status": "error", "message": "resource not found"}, status_code=404)
+        props = [p for p in properties.split(",") if p]
+        return {"id": object_id, "properties": {p: obj["properties"].get(p) for p in props}}
+
+    @app.get("/engagements/v1/engagements/associated/{object_type}/{object_id}/paged")
+    async def v1_associated(object_type: str, object_id: str, limit: int = 100, offset: int = 0):
+        portal = app.state.portal
+        ids = portal.associated(PLURAL[object_type], object_id, "engagements")
+        page = ids[offset:offset + min(limit, 100)]
+        return JSONResponse({
+            "results": [v1_engagement(portal, i) for i in page],
+            "hasMore": offset + len(page) < len(ids),
+            "offset": offset + len(page),
+        })
+
+    @app.get("/crm/v3/pipelines/deals")
+    async def pipelines():
+        stages = [
+            {"id": sid, "label": label, "displayOrder": n, "metadata": {"isClosed": closed, "probability": prob}}
+            for n, (sid, label, closed, prob) in enumerate(PIPELINE_STAGES)
+        ]
+        return {"results": [{"id": "default", "label": "Sales Pipeline", "stages": stages}]}
+
+    @app.get("/__fake/stats")
+    async def stats():
+        return dict(app.state.calls)
+
+    @app.post("/__fake/reset")
+    async def reset():
+        app.state.calls.clear()
+        return {"ok": True}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contacts", type=int, default=AccountShape.contacts)
+    parser.add_argument("--engagements", type=int, default=AccountShape.engagements)
+    parser.add_argument("--deals", type=int, default=AccountShape.deals)
+    parser.add_argument("--domain", default=AccountShape.domain)
+    parser.add_argument("--seed", type=int, default=AccountShape.seed)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability of an injected 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an injected 502")
+    parser.add_argument("--rate-limit", type=int, default=0, help="emulated calls per 10s (0 = off)")
+    parser.add_argument("--search-rate-limit", type=int, default=0, help="emulated search calls per second (0 = off)")
+    parser.add_argument("--fault-paths", default=None, help="regex of paths the faults apply to")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    shape = AccountShape(contacts=args.contacts, engagements=args.engagements, deals=args.deals, domain=args.domain, seed=args.seed)
+    faults = Faults(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_429=args.rate_429, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, search_rate_limit=args.search_rate_limit, paths=args.fault_paths,
+    )
+    print(f"🧪 Fake HubSpot for {shape.domain}: {shape.contacts} contacts, {shape.engagements} engagements, {shape.deals} deals")
+    uvicorn.run(create_app(shape, faults), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
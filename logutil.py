@@ -0,0 +1,112 @@
+"""Structured, level-gated logging.
+
+``log.debug("engagement", id=..., meta=...)`` emits one JSON line with the event
+name and fields. Nothing is formatted unless the level is enabled, fields are
+truncated to ``LOG_MAX_FIELD_CHARS``, and ``sample=`` keeps only a fraction of a
+noisy call site. Hot loops should still check ``log.debug_enabled`` once up front
+so a disabled level costs nothing per item.
+"""
+import json
+import logging
+import os
+import random
+import reprlib
+import sys
+import time
+from typing import Any, Optional
+
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "200"))
+
+
+_repr = reprlib.Repr()
+_repr.maxstring = _repr.maxother = LOG_MAX_FIELD_CHARS
+_repr.maxdict = _repr.maxlist = 20
+
+
+def cap(value: Any, limit: int = LOG_MAX_FIELD_CHARS) -> Any:
+    """Scalars pass through; anything else is stringified and cut to ``limit`` chars.
+
+    Containers go through reprlib, so a dict holding a whole email body is never
+    stringified in full just to be thrown away.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = value if isinstance(value, str) else _repr.repr(value)
+    if len(text) > limit:
+        return f"{text[:limit]}…(+{len(text) - limit} chars)"
+    return text
+
+
+class _Fields:
+    """Deferred message: only rendered if a handler actually formats the record."""
+
+    __slots__ = ("event", "fields")
+
+    def __init__(self, event: str, fields: dict):
+        self.event = event
+        self.fields = fields
+
+    def render(self) -> dict:
+        return {"event": self.event, **{k: cap(v) for k, v in self.fields.items()}}
+
+    def __str__(self) -> str:
+        return json.dumps(self.render(), default=str, ensure_ascii=False)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+        }
+        if isinstance(record.msg, _Fields):
+            payload.update(record.msg.render())
+        else:
+            payload["event"] = record.getMessage()
+        if record.exc_info:
+            payload["exc"] = cap(self.formatException(record.exc_info), 2000)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class StructuredLogger:
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(name)
+
+    @property
+    def debug_enabled(self) -> bool:
+        return self.logger.isEnabledFor(logging.DEBUG)
+
+    def _log(self, level: int, event: str, sample: float, fields: dict, exc_info=None):
+        if not self.logger.isEnabledFor(level):
+            return
+        if sample < 1.0 and random.random() >= sample:
+            return
+        self.logger.log(level, _Fields(event, fields), exc_info=exc_info)
+
+    def debug(self, event: str, sample: float = 1.0, **fields):
+        self._log(logging.DEBUG, event, sample, fields)
+
+    def info(self, event: str, sample: float = 1.0, **fields):
+        self._log(logging.INFO, event, sample, fields)
+
+    def warning(self, event: str, sample: float = 1.0, exc_info=None, **fields):
+        self._log(logging.WARNING, event, sample, fields, exc_info)
+
+    def error(self, event: str, sample: float = 1.0, exc_info=None, **fields):
+        self._log(logging.ERROR, event, sample, fields, exc_info)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(name)
+
+
+def configure_logging(level: Optional[str] = None, stream=sys.stdout):
+    """JSON lines on ``stream`` for the service's logger tree, at ``level`` or $LOG_LEVEL (default INFO)."""
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    root = logging.getLogger("hubspot_briefing")
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    root.propagate = False
@@ -3,24 +3,84 @@ print("⚡️ Starting HubSpot Briefing service…")
 print("HUBSPOT_TOKEN loaded?", bool(os.getenv("HUBSPOT_TOKEN")))
 print("OPENAI_API_KEY loaded?", bool(os.getenv("OPENAI_API_KEY")))
 
-import requests
+import asyncio
+import httpx
 import openai
-from fastapi import FastAPI, Query, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import BackgroundTasks, FastAPI, Query, HTTPException, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.openapi.utils import get_openapi
 from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 from dateutil.parser import isoparse
 import re
-from functools import lru_cache
+from contextlib import aclosing, asynccontextmanager
+from cache import TTLCache
+from logutil import configure_logging, get_logger
+from ratelimit import HubSpotScheduler, TokenBucket
+import metrics
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from timing import RequestTimings, in_phase, phase, record_call, start_request
+from deadline import DeadlineExceeded, remaining, start_deadline, within_deadline
+from resilience import NO_RETRY, HedgePolicy, LatencyTracker, RetryPolicy, parse_statuses, resilient_call
+from webhooks import ENGAGEMENT_TYPES, event_action, event_object_type, verify_signature
+from contextvars import ContextVar, copy_context
+import json
+import heapq
+from collections import Counter
+import time
 
 # —— Init & secrets ——
 DEBUG_INIT = os.getenv("DEBUG_INIT", "false").lower() == "true"
 print("⚙️ DEBUG_INIT mode:", DEBUG_INIT)
 load_dotenv()
+configure_logging()
+log = get_logger("hubspot_briefing")
 HUBSPOT_TOKEN = os.getenv("HUBSPOT_TOKEN")
+HUBSPOT_CLIENT_SECRET = os.getenv("HUBSPOT_CLIENT_SECRET", "")
+WEBHOOK_PUBLIC_URL = os.getenv("WEBHOOK_PUBLIC_URL", "").rstrip("/")
+HUBSPOT_API_BASE = os.getenv("HUBSPOT_API_BASE", "https://api.hubapi.com").rstrip("/")
+HUBSPOT_POOL_SIZE = int(os.getenv("HUBSPOT_POOL_SIZE", "20"))
+HUBSPOT_TIMEOUT_SECONDS = float(os.getenv("HUBSPOT_TIMEOUT_SECONDS", "10"))  # per attempt; a brief's deadline can cut it shorter
+# Per-token limits: 100 (Free/Starter) or 190 (Pro/Enterprise) per 10s; search is 5/s.
+# Refined at runtime from HubSpot's X-HubSpot-RateLimit-* response headers.
+HUBSPOT_RATE_LIMIT = int(os.getenv("HUBSPOT_RATE_LIMIT", "100"))
+HUBSPOT_RATE_LIMIT_INTERVAL = float(os.getenv("HUBSPOT_RATE_LIMIT_INTERVAL", "10"))
+HUBSPOT_SEARCH_RATE_LIMIT = int(os.getenv("HUBSPOT_SEARCH_RATE_LIMIT", "5"))
+HUBSPOT_RETRY_MAX_ATTEMPTS = int(os.getenv("HUBSPOT_RETRY_MAX_ATTEMPTS", "3"))
+HUBSPOT_RETRY = os.getenv("HUBSPOT_RETRY", "")  # per-family max attempts, e.g. "search:2,objects:4"
+HUBSPOT_RETRY_STATUSES = os.getenv("HUBSPOT_RETRY_STATUSES", "")  # per-family statuses to retry, e.g. "objects:5xx,search:502|503"
+HUBSPOT_HEDGE = os.getenv("HUBSPOT_HEDGE", "")  # families to hedge at a latency percentile, e.g. "objects:0.95"
+HUBSPOT_ENGAGEMENT_CONCURRENCY = int(os.getenv("HUBSPOT_ENGAGEMENT_CONCURRENCY", "5"))
+ENGAGEMENT_LOG_SAMPLE = float(os.getenv("ENGAGEMENT_LOG_SAMPLE", "1.0"))
+HUBSPOT_ENGAGEMENT_BACKEND = os.getenv("HUBSPOT_ENGAGEMENT_BACKEND", "v3").lower()
+LOOKUP_CACHE_SIZE = int(os.getenv("LOOKUP_CACHE_SIZE", "1024"))
+LOOKUP_CACHE_TTL = float(os.getenv("LOOKUP_CACHE_TTL", "300"))
+LOOKUP_CACHE_NEGATIVE_TTL = float(os.getenv("LOOKUP_CACHE_NEGATIVE_TTL", "30"))
+STAGE_MAP_REFRESH_SECONDS = float(os.getenv("STAGE_MAP_REFRESH_SECONDS", "900"))
+STAGE_MAP_DEADLINE_SECONDS = float(os.getenv("STAGE_MAP_DEADLINE_SECONDS", "30"))  # budget for one load, retries included
+# "label substring:bucket" rules, checked in order before the stage's isClosed/probability metadata
+DEAL_BUCKET_RULES = os.getenv(
+    "DEAL_BUCKET_RULES",
+    "closed won:closed_won,closed lost:closed_lost,expansion:expansion,resurrected:resurrected",
+)
+BRIEF_CACHE_SIZE = int(os.getenv("BRIEF_CACHE_SIZE", "256"))
+BRIEF_CACHE_TTL = float(os.getenv("BRIEF_CACHE_TTL", "120"))
+BRIEF_CACHE_STALE_TTL = float(os.getenv("BRIEF_CACHE_STALE_TTL", "600"))
+# Time budget for building one brief; past it, unfinished sections come back empty and marked degraded.
+BRIEF_DEADLINE_SECONDS = float(os.getenv("BRIEF_DEADLINE_SECONDS", "20"))
+BRIEF_DEADLINE_MAX_SECONDS = float(os.getenv("BRIEF_DEADLINE_MAX_SECONDS", "60"))
+# Defaults for the /brief window and size parameters
+DEAL_LOOKBACK_DAYS = int(os.getenv("DEAL_LOOKBACK_DAYS", str(365 * 3)))
+ENGAGEMENT_LOOKBACK_DAYS = int(os.getenv("ENGAGEMENT_LOOKBACK_DAYS", "0")) or None  # 0: no limit
+ENGAGEMENT_LIMIT = int(os.getenv("ENGAGEMENT_LIMIT", "20"))
+SUMMARY_LIMIT = int(os.getenv("SUMMARY_LIMIT", "5"))
+# How many general calls one search call is worth when costing plans. 0: the ratio of the two rate limits.
+PLANNER_SEARCH_WEIGHT = float(os.getenv("PLANNER_SEARCH_WEIGHT", "0")) or max(
+    1.0, HUBSPOT_RATE_LIMIT / HUBSPOT_RATE_LIMIT_INTERVAL / HUBSPOT_SEARCH_RATE_LIMIT
+)
+ASSOCIATION_COUNT_TTL = float(os.getenv("ASSOCIATION_COUNT_TTL", "86400"))
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 client = None
 if not DEBUG_INIT:
@@ -29,8 +89,21 @@ if not DEBUG_INIT:
 else:
     print("🚫 Skipping OpenAI client in DEBUG_INIT mode")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await get_stage_label_map()
+        log.info("stage_map.loaded", stages=len(_stage_map or {}))
+    except Exception as exc:
+        log.warning("stage_map.preload_failed", error=exc)
+    refresher = asyncio.create_task(keep_stage_label_map_fresh())
+    yield
+    refresher.cancel()
+    await hubspot.aclose()
+
 app = FastAPI(
     title="HubSpot Briefing",
+    lifespan=lifespan,
     version="1.0.0",
     openapi_url="/.well-known/openapi.json",
     docs_url=None,
@@ -89,19 +162,278 @@ class CompanyBrief(BaseModel):
     account_status: Optional[str] = None
     lifecycle_stage: Optional[str] = None
 
-    contacts: List[ContactInfo]
-    deals_closed_won: List[DealInfo]
-    deals_closed_lost: List[DealInfo]
-    deals_expansion: List[DealInfo]
-    deals_resurrected: List[DealInfo]
-    deals_active: List[DealInfo]
-    recent_engagements: List[EngagementInfo]
+    # Sections left out by ?fields= are None
+    contacts: Optional[List[ContactInfo]] = None
+    deals_closed_won: Optional[List[DealInfo]] = None
+    deals_closed_lost: Optional[List[DealInfo]] = None
+    deals_expansion: Optional[List[DealInfo]] = None
+    deals_resurrected: Optional[List[DealInfo]] = None
+    deals_active: Optional[List[DealInfo]] = None
+    recent_engagements: Optional[List[EngagementInfo]] = None
     formatted_engagements_emails: Optional[List[str]] = None
     formatted_engagements_calls: Optional[List[str]] = None
 
 class BriefResponse(BaseModel):
     contact: ContactInfo
     company: CompanyBrief
+    degraded: Optional[List[str]] = None  # sections cut short by the deadline; their fields are empty
+    debug: Optional[dict] = None
+
+# —— HubSpot client ——
+
+def build_hubspot_client() -> httpx.AsyncClient:
+    """One keep-alive client for every HubSpot call, so a brief pays for the TLS handshake once."""
+    return httpx.AsyncClient(
+        base_url=HUBSPOT_API_BASE,
+        headers={
+            "Authorization": f"Bearer {HUBSPOT_TOKEN}",
+            "Accept": "application/json",
+        },
+        limits=httpx.Limits(
+            max_connections=HUBSPOT_POOL_SIZE,
+            max_keepalive_connections=HUBSPOT_POOL_SIZE,
+            keepalive_expiry=60,
+        ),
+        timeout=httpx.Timeout(HUBSPOT_TIMEOUT_SECONDS),
+    )
+
+hubspot = build_hubspot_client()
+
+scheduler = HubSpotScheduler(
+    general=TokenBucket("general", HUBSPOT_RATE_LIMIT, HUBSPOT_RATE_LIMIT_INTERVAL),
+    search=TokenBucket("search", HUBSPOT_SEARCH_RATE_LIMIT, 1.0),
+    on_throttle=lambda path: metrics.hubspot_throttled.labels(endpoint_family(path)).inc(),
+)
+
+ENDPOINT_FAMILIES = ("search", "objects", "associations", "engagements_v1", "pipelines")
+
+def endpoint_family(path: str) -> str:
+    if path.startswith("/engagements/v1/"):
+        return "engagements_v1"
+    if path.startswith("/crm/v3/pipelines"):
+        return "pipelines"
+    if path.rstrip("/").endswith("/search"):
+        return "search"
+    if "/associations" in path:
+        return "associations"
+    return "objects"
+
+def parse_keyed_config(raw: str) -> dict:
+    """'objects:0.95,engagements_v1' -> {"objects": "0.95", "engagements_v1": ""} (insertion-ordered)."""
+    items = (x.strip().partition(":") for x in raw.split(",") if x.strip())
+    return {family: value for family, _, value in items}
+
+retry_attempts = parse_keyed_config(HUBSPOT_RETRY)
+retry_statuses = parse_keyed_config(HUBSPOT_RETRY_STATUSES)
+RETRY_POLICIES = {
+    family: RetryPolicy(
+        max_attempts=int(retry_attempts.get(family) or HUBSPOT_RETRY_MAX_ATTEMPTS),
+        retry_statuses=parse_statuses(retry_statuses[family]) if retry_statuses.get(family) else RetryPolicy.retry_statuses,
+    )
+    for family in ENDPOINT_FAMILIES
+}
+# Hedging is opt-in per family; it spends extra quota to cut the tail.
+HEDGE_POLICIES = {family: HedgePolicy() for family in ENDPOINT_FAMILIES}
+HEDGE_POLICIES.update({
+    family: HedgePolicy(enabled=True, percentile=float(pct or 0.95))
+    for family, pct in parse_keyed_config(HUBSPOT_HEDGE).items()
+})
+upstream_latency = {family: LatencyTracker() for family in ENDPOINT_FAMILIES}
+upstream_stats = {family: Counter() for family in ENDPOINT_FAMILIES}
+
+async def hs_request(method: str, path: str, idempotent: bool = True, **kwargs) -> dict:
+    """Every HubSpot call goes through here: paced by the shared scheduler, retried and hedged if it's a read.
+
+    Pacing, retries and the socket timeout all stop at the request's deadline.
+    """
+    family = endpoint_family(path)
+
+    def send():
+        left = remaining()
+        if left is not None:
+            kwargs["timeout"] = min(max(left, 0.001), HUBSPOT_TIMEOUT_SECONDS)
+        return hubspot.request(method, path, **kwargs)
+
+    def attempt():
+        return scheduler.send(path, send)
+
+    started, r = time.perf_counter(), None
+    metrics.hubspot_in_flight.inc()
+    try:
+        async with within_deadline():
+            r = await resilient_call(
+                attempt,
+                RETRY_POLICIES[family] if idempotent else NO_RETRY,
+                HEDGE_POLICIES[family] if idempotent else HedgePolicy(),
+                upstream_latency[family],
+                upstream_stats[family],
+            )
+    finally:
+        ended = time.perf_counter()
+        metrics.hubspot_in_flight.dec()
+        metrics.hubspot_latency.labels(family).observe(ended - started)
+        record_call(family, started, ended, len(r.content) if r is not None else 0)
+    r.raise_for_status()
+    return r.json()
+
+async def hs_get(path: str, **params) -> dict:
+    return await hs_request("GET", path, params=params or None)
+
+async def hs_post(path: str, body: dict) -> dict:
+    return await hs_request("POST", path, json=body)
+
+BATCH_READ_LIMIT = 100
+
+async def batch_read_objects(object_type: str, ids: List[str], properties: List[str]) -> dict:
+    """Read many CRM objects via batch/read, one concurrent call per 100 ids. Returns {id: properties}."""
+    chunks = [ids[i:i + BATCH_READ_LIMIT] for i in range(0, len(ids), BATCH_READ_LIMIT)]
+    pages = await asyncio.gather(*(
+        hs_post(f"/crm/v3/objects/{object_type}/batch/read", {
+            "properties": properties,
+            "inputs": [{"id": i} for i in chunk],
+        })
+        for chunk in chunks
+    ))
+    return {o["id"]: o.get("properties", {}) for page in pages for o in page.get("results", [])}
+
+def _consume_exception(fut: asyncio.Future):
+    # Shared fetches can outlive every waiter (all cut off at the deadline); their errors aren't news then.
+    if not fut.cancelled():
+        fut.exception()
+
+class HubSpotLoader:
+    """Request-scoped memo of HubSpot reads.
+
+    Every GET/POST is memoized on its full request, and single-object reads
+    issued in the same event-loop tick are merged into one batch/read call.
+    """
+
+    def __init__(self):
+        self._memo = {}
+        self._pending = {}
+
+    async def _once(self, key, factory):
+        fut = self._memo.get(key)
+        if fut is None:
+            fut = self._memo[key] = asyncio.ensure_future(factory())
+            fut.add_done_callback(_consume_exception)
+        # Shielded so one cancelled caller doesn't cancel the fetch for everyone else.
+        return await asyncio.shield(fut)
+
+    async def get(self, path: str, **params) -> dict:
+        key = ("GET", path, tuple(sorted(params.items())))
+        return await self._once(key, lambda: hs_get(path, **params))
+
+    async def post(self, path: str, body: dict) -> dict:
+        key = ("POST", path, json.dumps(body, sort_keys=True))
+        return await self._once(key, lambda: hs_post(path, body))
+
+    async def load(self, object_type: str, object_id: str, properties: List[str]) -> Optional[dict]:
+        """Properties of one object, or None if HubSpot doesn't return it."""
+        props = tuple(properties)
+        key = ("object", object_type, object_id, props)
+        fut = self._memo.get(key)
+        if fut is None:
+            fut = self._memo[key] = asyncio.get_running_loop().create_future()
+            fut.add_done_callback(_consume_exception)
+            batch = self._pending.get((object_type, props))
+            if batch is None:
+                batch = self._pending[(object_type, props)] = {}
+                asyncio.get_running_loop().call_soon(self._dispatch, object_type, props)
+            batch[object_id] = fut
+        return await asyncio.shield(fut)
+
+    async def load_many(self, object_type: str, ids: List[str], properties: List[str]) -> dict:
+        found = await asyncio.gather(*(self.load(object_type, i, properties) for i in ids))
+        return {i: p for i, p in zip(ids, found) if p is not None}
+
+    def _dispatch(self, object_type: str, props: tuple):
+        batch = self._pending.pop((object_type, props))
+        asyncio.ensure_future(self._run_batch(object_type, props, batch))
+
+    async def _run_batch(self, object_type: str, props: tuple, batch: dict):
+        try:
+            found = await batch_read_objects(object_type, list(batch), list(props))
+        except Exception as exc:
+            for fut in batch.values():
+                fut.set_exception(exc)
+            return
+        for object_id, fut in batch.items():
+            fut.set_result(found.get(object_id))
+
+_loader: ContextVar[Optional[HubSpotLoader]] = ContextVar("hubspot_loader", default=None)
+
+def current_loader() -> HubSpotLoader:
+    """The loader of the running /brief, or a throwaway one outside a request."""
+    return _loader.get() or HubSpotLoader()
+
+# —— Associations ——
+# A v4 batch read resolves associations for up to 1,000 source objects per call. A source with
+# more than a page of them comes back with a cursor, followed on the single-object v4 endpoint.
+
+ASSOCIATION_BATCH_LIMIT = 1000
+ASSOCIATION_PAGE_LIMIT = 500
+
+async def association_pages(from_type: str, object_id: str, to_type: str, after: str) -> List[str]:
+    """The rest of one object's associated ids, from cursor ``after`` to the end."""
+    loader, ids = current_loader(), []
+    while after:
+        data = await loader.get(
+            f"/crm/v4/objects/{from_type}/{object_id}/associations/{to_type}",
+            limit=ASSOCIATION_PAGE_LIMIT, after=after,
+        )
+        ids.extend(str(a["toObjectId"]) for a in data.get("results", []))
+        after = data.get("paging", {}).get("next", {}).get("after")
+    return ids
+
+async def get_associated_ids(from_type: str, ids: List[str], to_type: str) -> Dict[str, List[str]]:
+    """{source id: associated ids} for many sources, every page of them. Sources with none map to []."""
+    loader = current_loader()
+    chunks = [ids[i:i + ASSOCIATION_BATCH_LIMIT] for i in range(0, len(ids), ASSOCIATION_BATCH_LIMIT)]
+    pages = await asyncio.gather(*(
+        loader.post(f"/crm/v4/associations/{from_type}/{to_type}/batch/read", {"inputs": [{"id": i} for i in chunk]})
+        for chunk in chunks
+    ))
+    found = {i: [] for i in ids}
+    overflow = []
+    for page in pages:
+        for result in page.get("results", []):
+            source = str(result["from"]["id"])
+            found.setdefault(source, []).extend(str(a["toObjectId"]) for a in result.get("to", []))
+            after = result.get("paging", {}).get("next", {}).get("after")
+            if after:
+                overflow.append((source, after))
+    rest = await asyncio.gather(*(association_pages(from_type, source, to_type, after) for source, after in overflow))
+    for (source, _), more in zip(overflow, rest):
+        found[source].extend(more)
+    return found
+
+# Search-API lookups have a much tighter rate limit, and the same account comes up
+# repeatedly within a conversation, so cache them in-process.
+contact_cache = TTLCache(LOOKUP_CACHE_SIZE, LOOKUP_CACHE_TTL, negative_ttl=LOOKUP_CACHE_NEGATIVE_TTL)
+company_cache = TTLCache(LOOKUP_CACHE_SIZE, LOOKUP_CACHE_TTL, negative_ttl=LOOKUP_CACHE_NEGATIVE_TTL)
+
+# company id -> {count name: n}, as seen by the last brief that read them. Feeds the query planner,
+# as does domain -> company id, which outlives the company lookup so ?explain= can find the counts.
+association_counts = TTLCache(LOOKUP_CACHE_SIZE, ASSOCIATION_COUNT_TTL)
+company_ids = TTLCache(LOOKUP_CACHE_SIZE, ASSOCIATION_COUNT_TTL)
+
+def remember_counts(company_id: str, **counts: int):
+    association_counts.set(company_id, {**association_counts.peek(company_id, {}), **counts})
+
+DEAL_WINDOWS_KEPT = 8
+
+def remember_deal_counts(company_id: str, lookback_days: int, in_window: int, total: Optional[int] = None):
+    """Deals in a lookback window (the last few windows are kept), and all associated deals if known."""
+    windows = dict(association_counts.peek(company_id, {}).get("deal_windows", {}))
+    windows.pop(lookback_days, None)
+    windows[lookback_days] = in_window
+    while len(windows) > DEAL_WINDOWS_KEPT:
+        windows.pop(next(iter(windows)))
+    if total is None:
+        remember_counts(company_id, deal_windows=windows)
+    else:
+        remember_counts(company_id, deal_windows=windows, deals_total=total)
 
 # —— Helpers ——
 
@@ -125,30 +457,104 @@ def extract_call_outcome(metadata: dict) -> str:
     cleaned = strip_html(notes)
     return cleaned or "(no outcome logged)"
 
-@lru_cache()
-def get_stage_label_map() -> dict:
-    url = "https://api.hubapi.com/crm/v3/pipelines/deals"
-    headers = {"Authorization": f"Bearer {HUBSPOT_TOKEN}"}
-    r = requests.get(url, headers=headers); r.raise_for_status()
-    stage_map = {}
-    for pipeline in r.json().get("results", []):
+# The stage map is process-wide: loaded at startup, refreshed on a timer, and swapped
+# in whole so readers never see a half-built map.
+_stage_map: Optional[dict] = None
+_stage_buckets: dict = {}
+_stage_map_load: Optional[asyncio.Task] = None
+
+DEAL_BUCKETS = ("deals_closed_won", "deals_closed_lost", "deals_expansion", "deals_resurrected", "deals_active")
+DEAL_LABEL_RULES = [(needle.lower(), f"deals_{bucket}") for needle, bucket in parse_keyed_config(DEAL_BUCKET_RULES).items()]
+
+def label_bucket(label: str) -> Optional[str]:
+    st = label.lower()
+    for needle, bucket in DEAL_LABEL_RULES:
+        if needle in st:
+            return bucket
+    return None
+
+def stage_bucket(stage: dict) -> str:
+    """Bucket for one pipeline stage: label rules first, then the stage's isClosed/probability metadata."""
+    bucket = label_bucket(stage.get("label") or "")
+    if bucket:
+        return bucket
+    meta = stage.get("metadata") or {}
+    if str(meta.get("isClosed", "")).lower() == "true":
+        try:
+            probability = float(meta.get("probability"))
+        except (TypeError, ValueError):
+            probability = None
+        if probability is not None and probability >= 1:
+            return "deals_closed_won"
+        if probability is not None and probability <= 0:
+            return "deals_closed_lost"
+    return "deals_active"
+
+def classify_stage(stage_id: str) -> str:
+    """Bucket for a raw dealstage id; stages missing from the pipelines are matched on the id itself."""
+    return _stage_buckets.get(stage_id) or label_bucket(stage_id or "") or "deals_active"
+
+async def fetch_stage_metadata() -> tuple:
+    stage_map, buckets = {}, {}
+    for pipeline in (await hs_get("/crm/v3/pipelines/deals")).get("results", []):
         for stage in pipeline.get("stages", []):
             stage_map[stage["id"]] = stage["label"]
-    return stage_map
+            buckets[stage["id"]] = stage_bucket(stage)
+    return stage_map, buckets
+
+async def refresh_stage_label_map() -> dict:
+    """Reload the stage map and bucket table; on failure keep serving the last good ones."""
+    global _stage_map, _stage_buckets
+    try:
+        _stage_map, _stage_buckets = await fetch_stage_metadata()
+    except Exception as exc:
+        if _stage_map is None:
+            raise
+        log.warning("stage_map.refresh_failed", error=exc, kept_last_good=True)
+    return _stage_map
+
+async def get_stage_label_map() -> dict:
+    global _stage_map_load
+    if _stage_map is not None:
+        return _stage_map
+    # Cold start: concurrent first requests share one load instead of stampeding the pipelines API.
+    if _stage_map_load is None or _stage_map_load.done():
+        # Shared by every waiting request, so it gets its own budget rather than whichever came first's.
+        context = copy_context()
+        context.run(start_deadline, STAGE_MAP_DEADLINE_SECONDS)
+        _stage_map_load = asyncio.create_task(refresh_stage_label_map(), context=context)
+        _stage_map_load.add_done_callback(_consume_exception)
+    return await asyncio.shield(_stage_map_load)
+
+async def keep_stage_label_map_fresh():
+    while True:
+        await asyncio.sleep(STAGE_MAP_REFRESH_SECONDS)
+        start_deadline(STAGE_MAP_DEADLINE_SECONDS)
+        try:
+            await refresh_stage_label_map()
+        except Exception as exc:
+            log.warning("stage_map.refresh_failed", error=exc)
+
+def is_not_found(exc: Exception) -> bool:
+    return isinstance(exc, HTTPException) and exc.status_code == 404
 
-def get_contact_by_email(email: str) -> ContactInfo:
+async def get_contact_by_email(email: str) -> ContactInfo:
     if not email:
         raise ValueError("Email must be provided to get_contact_by_email")
+    key = email.strip().lower()
+    return await contact_cache.get_or_load(key, lambda: search_contact_by_email(key), is_not_found)
 
-    url = "https://api.hubapi.com/crm/v3/objects/contacts/search"
-    headers = {"Authorization": f"Bearer {HUBSPOT_TOKEN}", "Content-Type": "application/json"}
+async def get_company_by_domain(domain: str) -> dict:
+    key = domain.strip().lower()
+    return await company_cache.get_or_load(key, lambda: search_company_by_domain(key), is_not_found)
+
+async def search_contact_by_email(email: str) -> ContactInfo:
     body = {
         "filterGroups": [{"filters":[{"propertyName":"email","operator":"EQ","value":email}]}],
         "properties": ["firstname","lastname","email","jobtitle"],
         "limit": 1
     }
-    r = requests.post(url, headers=headers, json=body); r.raise_for_status()
-    results = r.json().get("results", [])
+    results = (await current_loader().post("/crm/v3/objects/contacts/search", body)).get("results", [])
     if not results:
         raise HTTPException(404, "Contact not found")
     c = results[0]; p = c["properties"]
@@ -160,16 +566,13 @@ def get_contact_by_email(email: str) -> ContactInfo:
         jobtitle=p.get("jobtitle") or ""
     )
 
-def get_company_by_domain(domain: str) -> dict:
-    url = "https://api.hubapi.com/crm/v3/objects/companies/search"
-    headers = {"Authorization": f"Bearer {HUBSPOT_TOKEN}", "Content-Type": "application/json"}
+async def search_company_by_domain(domain: str) -> dict:
     body = {
         "filterGroups": [{"filters":[{"propertyName":"domain","operator":"EQ","value":domain}]}],
         "properties": ["name","website","industry","lifecyclestage","2025_account_status"],
         "limit": 1
     }
-    r = requests.post(url, headers=headers, json=body); r.raise_for_status()
-    res = r.json().get("results", [])
+    res = (await current_loader().post("/crm/v3/objects/companies/search", body)).get("results", [])
     if not res:
         raise HTTPException(404, "Company not found")
     c = res[0]; p = c["properties"]
@@ -183,18 +586,15 @@ def get_company_by_domain(domain: str) -> dict:
         "account_status": p.get("2025_account_status") or ""
     }
 
-def get_associated_contacts(company_id: str) -> List[ContactInfo]:
-    url = f"https://api.hubapi.com/crm/v3/objects/companies/{company_id}/associations/contacts"
-    headers = {"Authorization": f"Bearer {HUBSPOT_TOKEN}"}
+async def get_associated_contacts(company_id: str) -> List[ContactInfo]:
+    loader = current_loader()
     contacts = []
-    for assoc in requests.get(url, headers=headers).json().get("results", []):
-        cid = assoc["id"]
-        cr = requests.get(
-            f"https://api.hubapi.com/crm/v3/objects/contacts/{cid}",
-            headers=headers,
-            params={"properties":"firstname,lastname,email,jobtitle"}
-        ); cr.raise_for_status()
-        p = cr.json()["properties"]
+    ids = (await get_associated_ids("companies", [company_id], "contacts"))[company_id]
+    details = await loader.load_many("contacts", ids, ["firstname","lastname","email","jobtitle"])
+    for cid in ids:
+        if cid not in details:
+            continue
+        p = details[cid]
         email = p.get("email")
         if email:
             contacts.append(ContactInfo(
@@ -204,110 +604,372 @@ def get_associated_contacts(company_id: str) -> List[ContactInfo]:
                 email=email,
                 jobtitle=str(p.get("jobtitle","") or "")
             ))
+    remember_counts(company_id, contacts=len(ids), emailed_contacts=len(contacts))
     return contacts
 
-def get_all_deals_for_company(company_id: str) -> List[DealInfo]:
-    url = "https://api.hubapi.com/crm/v3/objects/deals/search"
-    headers = {"Authorization": f"Bearer {HUBSPOT_TOKEN}", "Content-Type": "application/json"}
-    cutoff = int((datetime.utcnow() - timedelta(days=365 * 3)).timestamp() * 1000)
-    body = {
-        "filterGroups": [{
-            "filters": [
-                {"propertyName":"associations.company","operator":"EQ","value":company_id},
-                {"propertyName":"closedate","operator":"GTE","value":cutoff}
-            ]
-        }],
-        "properties": ["dealname","amount","dealstage","closedate"],
+def parse_amount(value) -> float:
+    try:
+        return float(str(value).replace(",", "").strip())
+    except:
+        return 0.0
+
+SEARCH_RESULT_CAP = 10000  # HubSpot search never pages past this many results
+DEAL_PROPERTIES = ["dealname","amount","dealstage","closedate"]
+
+def deal_search_body(company_id: str, start_ms: int, end_ms: Optional[int]) -> dict:
+    filters = [
+        {"propertyName":"associations.company","operator":"EQ","value":company_id},
+        {"propertyName":"closedate","operator":"GTE","value":start_ms},
+    ]
+    if end_ms is not None:
+        filters.append({"propertyName":"closedate","operator":"LT","value":end_ms})
+    return {
+        "filterGroups": [{"filters": filters}],
+        "sorts": [{"propertyName": "closedate", "direction": "ASCENDING"}],
+        "properties": DEAL_PROPERTIES,
         "limit": 100
     }
-    r = requests.post(url, headers=headers, json=body); r.raise_for_status()
-    deals = []
-    stage_map = get_stage_label_map()
-    for d in r.json().get("results", []):
-        p = d["properties"]
-        try:
-            amt = float(str(p.get("amount","0")).replace(",", "").strip())
-        except:
-            amt = 0.0
-        deals.append(DealInfo(
-            id=d["id"],
-            name=p.get("dealname","") or "",
-            amount=amt,
-            stage=stage_map.get(p.get("dealstage",""), p.get("dealstage","")),
-            closedate=isoparse(p["closedate"]) if p.get("closedate") else None
-        ))
-    return deals
-
-def get_recent_engagements(company_id: str) -> List[EngagementInfo]:
-    headers = {"Authorization": f"Bearer {HUBSPOT_TOKEN}", "Content-Type": "application/json"}
-    engs = []
-
-    print(f"🔍 DEBUG: Pulling engagements for company ID {company_id}")
-
-    # Company-level
-    url_c = f"https://api.hubapi.com/engagements/v1/engagements/associated/company/{company_id}/paged"
+
+async def stream_deal_records(body: dict, first: Optional[dict] = None) -> AsyncIterator[dict]:
+    """Every record of one deal search, following paging.next.after."""
+    data = first or await current_loader().post("/crm/v3/objects/deals/search", body)
+    while True:
+        for record in data.get("results", []):
+            yield record
+        after = data.get("paging", {}).get("next", {}).get("after")
+        if not after:
+            break
+        data = await current_loader().post("/crm/v3/objects/deals/search", {**body, "after": after})
+
+async def fetch_deal_window(company_id: str, start_ms: int, end_ms: Optional[int], now_ms: int) -> List[dict]:
+    """Deals closing in [start_ms, end_ms), split into concurrent sub-windows while over the search cap.
+
+    An open-ended window is split once, at ``now_ms``; the caller fixes that instant so
+    the ``(now_ms, None)`` half can't split again and falls through to the resume loop.
+    """
+    body = deal_search_body(company_id, start_ms, end_ms)
+    first = await current_loader().post("/crm/v3/objects/deals/search", body)
+    if first.get("total", 0) > SEARCH_RESULT_CAP:
+        if end_ms is None and start_ms < now_ms:
+            windows = [(start_ms, now_ms), (now_ms, None)]
+        elif end_ms is not None and end_ms - start_ms > 1:
+            mid = (start_ms + end_ms) // 2
+            windows = [(start_ms, mid), (mid, end_ms)]
+        else:
+            windows = []
+        if windows:
+            parts = await asyncio.gather(*(fetch_deal_window(company_id, s, e, now_ms) for s, e in windows))
+            return [record for part in parts for record in part]
+
+    records, seen = [], set()
+    while True:
+        fetched, added, last_close = 0, 0, None
+        async with aclosing(stream_deal_records(body, first)) as stream:
+            async for record in stream:
+                fetched += 1
+                if record["id"] not in seen:
+                    seen.add(record["id"])
+                    records.append(record)
+                    added += 1
+                last_close = record.get("properties", {}).get("closedate") or last_close
+                if fetched >= SEARCH_RESULT_CAP:
+                    break
+        # Only an open-ended window that can't be split further gets here still capped:
+        # resume from the last closedate seen (ascending sort) and skip the overlap.
+        if fetched < SEARCH_RESULT_CAP or not added or not last_close:
+            return records
+        body = deal_search_body(company_id, int(isoparse(last_close).timestamp() * 1000), end_ms)
+        first = None
+
+def deal_from_record(record: dict, stage_map: dict) -> DealInfo:
+    p = record["properties"]
+    return DealInfo(
+        id=record["id"],
+        name=p.get("dealname","") or "",
+        amount=parse_amount(p.get("amount","0")),
+        stage=stage_map.get(p.get("dealstage",""), p.get("dealstage","")),
+        closedate=isoparse(p["closedate"]) if p.get("closedate") else None
+    )
+
+def lookback_ms(days: int) -> int:
+    return int((datetime.now(timezone.utc) - timedelta(days=days)).timestamp() * 1000)
+
+async def fetch_deals_by_association(company_id: str, lookback_days: int) -> List[dict]:
+    """Deals closing in the lookback window, via the company's deal associations and batch reads.
+
+    Every associated deal is read and filtered here, in the search's closedate order.
+    """
+    start_ms = lookback_ms(lookback_days)
+    ids = (await get_associated_ids("companies", [company_id], "deals"))[company_id]
+    found = await batch_read_objects("deals", ids, DEAL_PROPERTIES)
+    dated = []
+    for i in ids:
+        p = found.get(i)
+        if p and p.get("closedate"):
+            close_ms = isoparse(p["closedate"]).timestamp() * 1000
+            if close_ms >= start_ms:
+                dated.append((close_ms, {"id": i, "properties": p}))
+    dated.sort(key=lambda x: x[0])
+    remember_deal_counts(company_id, lookback_days, len(dated), total=len(ids))
+    return [record for _, record in dated]
+
+async def fetch_deal_search(company_id: str, lookback_days: int) -> List[dict]:
+    records = await fetch_deal_window(company_id, lookback_ms(lookback_days), None, int(time.time() * 1000))
+    total = None
+    if len(records) > 100 and association_counts.peek(company_id, {}).get("deals_total") is None:
+        # Past one search page the association read could be cheaper, and only the total can tell
+        total = len((await get_associated_ids("companies", [company_id], "deals"))[company_id])
+    remember_deal_counts(company_id, lookback_days, len(records), total)
+    return records
+
+DEAL_STRATEGIES = {"search": fetch_deal_search, "associations": fetch_deals_by_association}
+
+async def fetch_deal_records(company_id: str, lookback_days: int = DEAL_LOOKBACK_DAYS, strategy: str = "search") -> tuple:
+    return await asyncio.gather(
+        DEAL_STRATEGIES[strategy](company_id, lookback_days),
+        get_stage_label_map(),
+    )
+
+async def get_all_deals_for_company(company_id: str, lookback_days: int = DEAL_LOOKBACK_DAYS, strategy: str = "search") -> List[DealInfo]:
+    records, stage_map = await fetch_deal_records(company_id, lookback_days, strategy)
+    return [deal_from_record(d, stage_map) for d in records]
+
+async def get_classified_deals(company_id: str, lookback_days: int = DEAL_LOOKBACK_DAYS, strategy: str = "search") -> List[tuple]:
+    """(bucket, deal) pairs; the bucket is a table lookup on the raw dealstage id."""
+    records, stage_map = await fetch_deal_records(company_id, lookback_days, strategy)
+    return [(classify_stage(d["properties"].get("dealstage") or ""), deal_from_record(d, stage_map)) for d in records]
+
+class EngagementFeed(NamedTuple):
+    label: str
+    items: AsyncIterator[dict]
+    types: tuple
+    newest_first: bool = False
+
+class TopK:
+    """The k newest engagements seen across several feeds, deduped by id.
+
+    Ties on timestamp resolve by ``seq`` (feed index, position in feed), so the
+    result matches sorting the concatenated feeds whatever order items arrive in.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap = []     # min-heap of [ts, -seq, id, item]
+        self._entries = {}  # id -> heap entry
+
+    @property
+    def floor(self) -> Optional[float]:
+        """Timestamp an item must reach to get in, once the heap is full."""
+        return self._heap[0][0] if self.k > 0 and len(self._heap) >= self.k else None
+
+    def offer(self, eng_id: str, ts: float, seq: tuple, build: Callable[[], object]):
+        neg_seq = tuple(-x for x in seq)
+        entry = self._entries.get(eng_id)
+        if entry is not None:
+            if neg_seq > entry[1]:
+                entry[1] = neg_seq
+                heapq.heapify(self._heap)
+            return
+        if self.k <= 0 or (len(self._heap) >= self.k and (ts, neg_seq) <= (self._heap[0][0], self._heap[0][1])):
+            return
+        entry = self._entries[eng_id] = [ts, neg_seq, eng_id, build()]
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        else:
+            del self._entries[heapq.heapreplace(self._heap, entry)[2]]
+
+    def items(self) -> list:
+        return [e[3] for e in sorted(self._heap, key=lambda e: (e[0], e[1]), reverse=True)]
+
+async def v1_engagement_feed(kind: str, object_id: str) -> AsyncIterator[dict]:
+    url = f"/engagements/v1/engagements/associated/{kind}/{object_id}/paged"
     offset = None
     while True:
         params = {"limit": 100}
         if offset:
             params["offset"] = offset
-        r = requests.get(url_c, headers=headers, params=params); r.raise_for_status()
-        data = r.json()
+        data = await current_loader().get(url, **params)
         for e in data.get("results", []):
+            yield e
+        if not data.get("hasMore"):
+            break
+        offset = data.get("offset")
+
+async def merge_top_k(top: TopK, index: int, feed: EngagementFeed, since_ms: Optional[int] = None):
+    """Drain one feed into ``top``; newest-first feeds stop paging once they can't beat the floor or pass ``since_ms``."""
+    pos = 0
+    trace = log.debug_enabled  # checked once per feed; a disabled level costs nothing per item
+    try:
+        async for e in feed.items:
             eng = e.get("engagement", {})
             meta = e.get("metadata", {})
             t = eng.get("type","").lower()
-            ts = eng.get("timestamp")
-            print(f"📌 [COMPANY] ID: {eng.get('id')} TYPE: {t} META: {meta}")
-            if t not in ("email", "call"):
+            ts = eng.get("timestamp") or float("-inf")
+            if trace:
+                log.debug("engagement", sample=ENGAGEMENT_LOG_SAMPLE, feed=feed.label, id=eng.get("id"), type=t, meta=meta)
+            pos += 1
+            if feed.newest_first and ((top.floor is not None and ts < top.floor) or (since_ms is not None and ts < since_ms)):
+                break
+            if t not in feed.types or (since_ms is not None and ts < since_ms):
                 continue
-            subject = extract_email_subject(meta) if t == "email" else extract_call_outcome(meta)
-            engs.append(EngagementInfo(
+            top.offer(str(eng.get("id")), ts, (index, pos), lambda: EngagementInfo(
                 id=str(eng.get("id")),
                 type=eng.get("type").title(),
-                createdAt=datetime.fromtimestamp(ts/1000.0) if ts else datetime.min,
-                subject=subject
+                createdAt=datetime.fromtimestamp(ts/1000.0) if ts > 0 else datetime.min,
+                subject=extract_email_subject(meta) if t == "email" else extract_call_outcome(meta)
             ))
-        if not data.get("hasMore"):
+    finally:
+        await feed.items.aclose()
+
+ENGAGEMENT_SEARCH_PROPERTIES = {
+    "emails": ["hs_timestamp", "hs_email_subject", "hs_email_text", "hs_body_preview"],
+    "calls": ["hs_timestamp", "hs_call_title", "hs_call_body"],
+}
+
+def search_record_to_engagement(object_type: str, record: dict) -> dict:
+    """Reshape a v3 emails/calls search hit into the v1 engagement shape the rest of the code reads."""
+    p = record.get("properties", {})
+    ts = int(isoparse(p["hs_timestamp"]).timestamp() * 1000) if p.get("hs_timestamp") else None
+    if object_type == "emails":
+        meta = {"subject": p.get("hs_email_subject"), "bodyPreview": p.get("hs_body_preview"), "text": p.get("hs_email_text")}
+        etype = "EMAIL"
+    else:
+        meta = {"body": p.get("hs_call_body"), "title": p.get("hs_call_title")}
+        etype = "CALL"
+    return {"engagement": {"id": record["id"], "type": etype, "timestamp": ts}, "metadata": meta}
+
+async def v3_engagement_feed(object_type: str, filter_groups: List[dict], limit: int) -> AsyncIterator[dict]:
+    """Newest-first emails/calls matching ``filter_groups``, stopping after ``limit`` hits."""
+    body = {
+        "filterGroups": filter_groups,
+        "sorts": [{"propertyName": "hs_timestamp", "direction": "DESCENDING"}],
+        "properties": ENGAGEMENT_SEARCH_PROPERTIES[object_type],
+        "limit": max(1, min(limit, 100)),
+    }
+    fetched, after = 0, None
+    while fetched < limit:
+        page_body = {**body, "after": after} if after else body
+        data = await current_loader().post(f"/crm/v3/objects/{object_type}/search", page_body)
+        for record in data.get("results", []):
+            yield search_record_to_engagement(object_type, record)
+            fetched += 1
+        after = data.get("paging", {}).get("next", {}).get("after")
+        if not after:
             break
-        offset = data.get("offset")
 
-    # Contact-level calls
-    contacts = get_associated_contacts(company_id)
-    for contact in contacts:
-        print(f"🔍 DEBUG: Pulling calls for contact ID {contact.id}")
-        url_p = f"https://api.hubapi.com/engagements/v1/engagements/associated/contact/{contact.id}/paged"
-        offset = None
-        while True:
-            params = {"limit": 100}
-            if offset:
-                params["offset"] = offset
-            r = requests.get(url_p, headers=headers, params=params); r.raise_for_status()
-            data = r.json()
-            for e in data.get("results", []):
-                eng = e.get("engagement", {})
-                meta = e.get("metadata", {})
-                t = eng.get("type","").lower()
-                ts = eng.get("timestamp")
-                print(f"📌 [CONTACT] ID: {eng.get('id')} TYPE: {t} META: {meta}")
-                if t != "call":
-                    continue
-                subject = extract_call_outcome(meta)
-                engs.append(EngagementInfo(
-                    id=str(eng.get("id")),
-                    type=eng.get("type").title(),
-                    createdAt=datetime.fromtimestamp(ts/1000.0) if ts else datetime.min,
-                    subject=subject
-                ))
-            if not data.get("hasMore"):
-                break
-            offset = data.get("offset")
+async def contact_calls_feed(company_id: str, contact_ids: List[str], limit: int, since_ms: Optional[int]) -> AsyncIterator[dict]:
+    """The newest ``limit`` calls logged on any of ``contact_ids``, newest first.
+
+    Resolved with v4 batch associations and batch reads instead of a search per
+    contact. Past one batch of calls, only timestamps are read for the lot, and
+    full properties only for the ones that can make the cut. Associations can't
+    be filtered by time, so ``since_ms`` and ``limit`` only apply after that
+    timestamp read: its cost follows the contacts' whole call history, not the
+    window (the planner weighs it against the per-contact search).
+    """
+    loader = current_loader()
+    assoc = await get_associated_ids("contacts", contact_ids, "calls")
+    call_ids = list(dict.fromkeys(i for ids in assoc.values() for i in ids))
+    remember_counts(company_id, contact_calls=len(call_ids))
+    props = ENGAGEMENT_SEARCH_PROPERTIES["calls"]
+
+    def newest(found: dict) -> List[str]:
+        stamped = []
+        for i in call_ids:
+            if i not in found:
+                continue  # associated but not readable (archived, or out of the token's scope)
+            raw = found[i].get("hs_timestamp")
+            ts = isoparse(raw).timestamp() * 1000 if raw else float("-inf")
+            if since_ms is None or ts >= since_ms:
+                stamped.append((ts, i))
+        stamped.sort(key=lambda x: x[0], reverse=True)  # stable, so ties keep association order
+        return [i for _, i in stamped[:limit]]
+
+    if len(call_ids) > BATCH_READ_LIMIT:
+        # Straight to batch/read: thousands of ids gain nothing from the loader's per-object coalescing
+        call_ids = newest(await batch_read_objects("calls", call_ids, ["hs_timestamp"]))
+    found = await loader.load_many("calls", call_ids, props)
+    for i in newest(found):
+        yield search_record_to_engagement("calls", {"id": i, "properties": found[i]})
+
+def association_filter_group(object_type: str, object_id: str, since_ms: Optional[int]) -> dict:
+    filters = [{"propertyName": f"associations.{object_type}", "operator": "EQ", "value": object_id}]
+    if since_ms is not None:
+        filters.append({"propertyName": "hs_timestamp", "operator": "GTE", "value": since_ms})
+    return {"filters": filters}
+
+SEARCH_FILTER_GROUP_LIMIT = 5
 
-    engs = {e.id: e for e in engs}.values()
-    engs = sorted(engs, key=lambda x: x.createdAt, reverse=True)
-    return [e for e in engs if e.type in ("Email","Call")][:20]
+def contact_calls_feeds(company_id: str, contacts: List[ContactInfo], limit: int, since_ms: Optional[int], strategy: str) -> List[EngagementFeed]:
+    if not contacts:
+        return []
+    if strategy == "associations":
+        calls = contact_calls_feed(company_id, [c.id for c in contacts], limit, since_ms)
+        return [EngagementFeed("CONTACT", calls, ("call",), newest_first=True)]
+    # One calls search covers up to five contacts (HubSpot's filter-group cap)
+    feeds = []
+    for i in range(0, len(contacts), SEARCH_FILTER_GROUP_LIMIT):
+        groups = [association_filter_group("contact", c.id, since_ms) for c in contacts[i:i + SEARCH_FILTER_GROUP_LIMIT]]
+        feeds.append(EngagementFeed("CONTACT", v3_engagement_feed("calls", groups, limit), ("call",), newest_first=True))
+    return feeds
+
+async def recent_engagements_v1(company_id: str, limit: int, since_ms: Optional[int]) -> List[EngagementInfo]:
+    top = TopK(limit)
+
+    # Company-level emails and calls
+    company_feed = EngagementFeed("COMPANY", v1_engagement_feed("company", company_id), ("email", "call"))
+
+    # Contact-level calls, paged in parallel under a cap so a big account can't burst past the rate limit.
+    # The v1 associated feeds carry no ordering guarantee, so they are drained rather than cut off early.
+    sem = asyncio.Semaphore(HUBSPOT_ENGAGEMENT_CONCURRENCY)
+
+    async def contact_calls(index: int, contact_id: str):
+        async with sem:
+            log.debug("engagements.contact_calls", contact_id=contact_id)
+            feed = EngagementFeed("CONTACT", v1_engagement_feed("contact", contact_id), ("call",))
+            await merge_top_k(top, index, feed, since_ms)
+
+    contacts, _ = await asyncio.gather(get_associated_contacts(company_id), merge_top_k(top, 0, company_feed, since_ms))
+    await asyncio.gather(*(contact_calls(i, c.id) for i, c in enumerate(contacts, start=1)))
+    return top.items()
+
+async def recent_engagements_v3(company_id: str, limit: int, since_ms: Optional[int], contact_calls: str = "associations") -> List[EngagementInfo]:
+    top = TopK(limit)
+    company_group = [association_filter_group("company", company_id, since_ms)]
+    feeds = [
+        EngagementFeed("COMPANY", v3_engagement_feed("emails", company_group, limit), ("email",), newest_first=True),
+        EngagementFeed("COMPANY", v3_engagement_feed("calls", company_group, limit), ("call",), newest_first=True),
+    ]
+    contacts = await get_associated_contacts(company_id)
+    feeds.extend(contact_calls_feeds(company_id, contacts, limit, since_ms, contact_calls))
 
-def format_engagement_summary(engs: List[EngagementInfo], limit: int = 5) -> dict:
+    sem = asyncio.Semaphore(HUBSPOT_ENGAGEMENT_CONCURRENCY)
+
+    async def run(index: int, feed: EngagementFeed):
+        async with sem:
+            await merge_top_k(top, index, feed, since_ms)
+
+    await asyncio.gather(*(run(i, f) for i, f in enumerate(feeds)))
+    return top.items()
+
+async def get_recent_engagements(
+    company_id: str,
+    limit: int = ENGAGEMENT_LIMIT,
+    since_ms: Optional[int] = None,
+    contact_calls: str = "associations",
+) -> List[EngagementInfo]:
+    log.debug("engagements.fetch", company_id=company_id, limit=limit, backend=HUBSPOT_ENGAGEMENT_BACKEND)
+    if HUBSPOT_ENGAGEMENT_BACKEND == "v3":
+        try:
+            return await recent_engagements_v3(company_id, limit, since_ms, contact_calls)
+        except httpx.HTTPStatusError as exc:
+            # e.g. a private app without the emails/calls scopes; the v1 feeds still work there
+            if exc.response.status_code not in (400, 403, 404):
+                raise
+            log.warning("engagements.v3_fallback", company_id=company_id, status=exc.response.status_code)
+    return await recent_engagements_v1(company_id, limit, since_ms)
+
+def format_engagement_summary(engs: List[EngagementInfo], limit: int = SUMMARY_LIMIT) -> dict:
     emails, calls = [], []
     cnt_e = cnt_c = 0
     for e in engs:
@@ -321,29 +983,298 @@ def format_engagement_summary(engs: List[EngagementInfo], limit: int = 5) -> dic
             break
     return {"emails": emails, "calls": calls}
 
-@app.get("/brief", response_model=BriefResponse)
-def brief(email: str = Query(None), domain: str = Query(...)):
-    if email:
-        contact = get_contact_by_email(email)
+async def brief_section(name: str, awaitable, fallback, degraded: List[str]):
+    """Await one section within the deadline; if it runs out, note the section and use ``fallback``."""
+    try:
+        async with within_deadline():
+            return await in_phase(name, awaitable)
+    except DeadlineExceeded:
+        awaitable.close()  # never started if the budget was already spent
+        degraded.append(name)
+        metrics.brief_degraded_sections.labels(name).inc()
+        log.warning("brief.section_degraded", section=name)
+        return fallback
+
+# —— Brief sections ——
+# Each section resolves a group of CompanyBrief fields and runs only if a requested field needs it.
+
+class BriefOptions(NamedTuple):
+    """Windows and sizes for one brief, pushed into the HubSpot queries. Part of the cache key."""
+    deal_lookback_days: int = DEAL_LOOKBACK_DAYS
+    engagement_lookback_days: Optional[int] = ENGAGEMENT_LOOKBACK_DAYS
+    engagement_limit: int = ENGAGEMENT_LIMIT
+    summary_limit: int = SUMMARY_LIMIT
+
+# Resolvers take the strategy the query planner picked for their section.
+
+async def resolve_contacts(company_id: str, options: BriefOptions, strategy: str) -> dict:
+    return {"contacts": await get_associated_contacts(company_id)}
+
+async def resolve_deals(company_id: str, options: BriefOptions, strategy: str) -> dict:
+    # One fetch covers every bucket, so asking for one bucket still fills them all.
+    buckets = {b: [] for b in DEAL_BUCKETS}
+    for bucket, d in await get_classified_deals(company_id, options.deal_lookback_days, strategy):
+        buckets[bucket].append(d)
+    return buckets
+
+async def resolve_engagements(company_id: str, options: BriefOptions, strategy: str) -> dict:
+    since_ms = lookback_ms(options.engagement_lookback_days) if options.engagement_lookback_days else None
+    engs = await get_recent_engagements(company_id, options.engagement_limit, since_ms, strategy)
+    formatted = format_engagement_summary(engs, options.summary_limit)
+    return {
+        "recent_engagements": engs,
+        "formatted_engagements_emails": formatted["emails"],
+        "formatted_engagements_calls": formatted["calls"],
+    }
+
+class BriefSection(NamedTuple):
+    resolve: Callable[[str, BriefOptions, str], object]
+    fields: tuple
+
+BRIEF_SECTIONS = {
+    "contacts": BriefSection(resolve_contacts, ("contacts",)),
+    "deals": BriefSection(resolve_deals, DEAL_BUCKETS),
+    "engagements": BriefSection(resolve_engagements, ("recent_engagements", "formatted_engagements_emails", "formatted_engagements_calls")),
+}
+ALL_SECTIONS = frozenset(BRIEF_SECTIONS)
+
+# ?fields= names -> (section, CompanyBrief fields)
+BRIEF_FIELDS = {
+    "contacts": ("contacts", ("contacts",)),
+    "deals": ("deals", DEAL_BUCKETS),
+    **{f"deals.{b.removeprefix('deals_')}": ("deals", (b,)) for b in DEAL_BUCKETS},
+    "engagements": ("engagements", ("recent_engagements",)),
+    "summaries": ("engagements", ("formatted_engagements_emails", "formatted_engagements_calls")),
+}
+
+class FieldSelection(NamedTuple):
+    sections: frozenset
+    fields: frozenset
+
+def parse_fields(*raw: Optional[str]) -> Optional[FieldSelection]:
+    """'deals.closed_won,summaries' -> the sections to build and the fields to return; None means everything."""
+    names = [n.strip().lower() for r in raw if r for n in r.split(",") if n.strip()]
+    if not names:
+        return None
+    unknown = [n for n in names if n not in BRIEF_FIELDS]
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}. Choose from: {', '.join(BRIEF_FIELDS)}")
+    return FieldSelection(
+        frozenset(BRIEF_FIELDS[n][0] for n in names),
+        frozenset(f for n in names for f in BRIEF_FIELDS[n][1]),
+    )
+
+def project_brief(b: BriefResponse, selection: Optional[FieldSelection]) -> BriefResponse:
+    """Blank out the fields ``selection`` didn't ask for (a cached brief may hold more)."""
+    if selection is None:
+        return b
+    hidden = {f: None for section in BRIEF_SECTIONS.values() for f in section.fields if f not in selection.fields}
+    return b.model_copy(update={"company": b.company.model_copy(update=hidden)})
+
+# —— Query planner ——
+# Search answers a filtered, sorted query in one call, but it has its own, much smaller rate
+# limit and stops at 10,000 results. Association reads plus batch reads cost a call or two more
+# on a small account, but they use the general limit and grow slower with the account. Each
+# section's strategies are costed from the association counts the company's last brief saw,
+# with a search call weighted by PLANNER_SEARCH_WEIGHT, and the cheapest is used. A count not
+# seen yet is taken as zero, and the section then uses its default strategy.
+# Deal search is costed from the deals in the window (estimated from the windows seen before)
+# and the association read from all associated deals. The total is only read when a search
+# needs more than one page (below that the association read can't win). Until both are
+# known the deals section stays on search, which counts the window for next time.
+
+class Cost(NamedTuple):
+    search: int = 0
+    other: int = 0
+
+    @property
+    def calls(self) -> int:
+        return self.search + self.other
+
+    def plus(self, more: "Cost") -> "Cost":
+        return Cost(self.search + more.search, self.other + more.other)
+
+    def weighted(self) -> float:
+        return self.other + PLANNER_SEARCH_WEIGHT * self.search
+
+    def to_dict(self) -> dict:
+        return {"calls": self.calls, "search_calls": self.search, "cost": round(self.weighted(), 2)}
+
+class SectionPlan(NamedTuple):
+    strategy: str
+    cost: Cost
+    candidates: Dict[str, Cost]
+    counts: Dict[str, Optional[int]]
+    note: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        plan = {
+            "strategy": self.strategy,
+            "counts": self.counts,
+            **self.cost.to_dict(),
+            "candidates": {name: cost.to_dict() for name, cost in self.candidates.items()},
+        }
+        if self.note:
+            plan["note"] = self.note
+        return plan
+
+def div_up(n: int, size: int) -> int:
+    return -(-n // size)
+
+def association_read_cost(sources: int, targets: int) -> Cost:
+    """v4 association reads for ``sources`` objects sharing ``targets`` associations evenly."""
+    if not sources:
+        return Cost()
+    extra_pages = max(0, div_up(div_up(targets, sources), ASSOCIATION_PAGE_LIMIT) - 1)
+    return Cost(other=div_up(sources, ASSOCIATION_BATCH_LIMIT) + sources * extra_pages)
+
+def search_pages(results: int, page_size: int = 100) -> int:
+    return max(1, div_up(results, page_size))
+
+def contacts_costs(contacts: int) -> Dict[str, Cost]:
+    return {"associations": association_read_cost(1, contacts).plus(Cost(other=div_up(contacts, BATCH_READ_LIMIT)))}
+
+def deal_costs(in_window: int, total: int) -> Dict[str, Cost]:
+    searches = search_pages(in_window)
+    if in_window > SEARCH_RESULT_CAP:
+        searches += 2 * div_up(in_window, SEARCH_RESULT_CAP)  # first pages of the split windows
+    return {
+        "search": Cost(search=searches),
+        "associations": association_read_cost(1, total).plus(Cost(other=div_up(total, BATCH_READ_LIMIT))),
+    }
+
+def deals_in_window(counts: dict, lookback_days: int) -> Optional[int]:
+    """Deals expected in a ``lookback_days`` window, from the windows counted before.
+
+    Exact for a window seen before and interpolated between two seen windows.
+    Outside them it's unknown: deals closing in the future sit in every window,
+    so counts don't scale with the window's length.
+    """
+    windows = counts.get("deal_windows") or {}
+    if lookback_days in windows:
+        return windows[lookback_days]
+    below = max((d for d in windows if d < lookback_days), default=None)
+    above = min((d for d in windows if d > lookback_days), default=None)
+    if below is None or above is None:
+        return None
+    share = (lookback_days - below) / (above - below)
+    return round(windows[below] + share * (windows[above] - windows[below]))
+
+def engagement_costs(contacts: int, calls: int, limit: int) -> Dict[str, Cost]:
+    """Candidates differ in how contact calls are found; company emails and calls are always a search each."""
+    company = Cost(search=2 * search_pages(limit))
+    if calls > BATCH_READ_LIMIT:
+        reads = div_up(calls, BATCH_READ_LIMIT) + div_up(limit, BATCH_READ_LIMIT)  # timestamps, then the newest
     else:
-        contact = ContactInfo(id="", firstname="", lastname="", email="", jobtitle="")
+        reads = div_up(calls, BATCH_READ_LIMIT)
+    return {
+        "search": company.plus(Cost(search=div_up(contacts, SEARCH_FILTER_GROUP_LIMIT) * search_pages(limit))),
+        "associations": company.plus(association_read_cost(contacts, calls)).plus(Cost(other=reads)),
+    }
 
-    comp = get_company_by_domain(domain)
-    cid = comp["id"]
+CONTACT_CALLS_TRADEOFF = (
+    "contact calls: 'associations' reads hs_timestamp for every call ever logged on the contacts and applies "
+    "the lookback and limit afterwards, so its cost follows call history, not the window; 'search' filters "
+    "upstream but takes a search call per five contacts whatever the window"
+)
+
+def pick(candidates: Dict[str, Cost], counts: Dict[str, Optional[int]], default: str, known: Optional[bool] = None) -> SectionPlan:
+    if known is None:
+        known = all(n is not None for n in counts.values())
+    if not known:
+        strategy = default
+    else:
+        # Ties go to fewer calls, then to the first listed
+        strategy = min(candidates, key=lambda name: (candidates[name].weighted(), candidates[name].calls))
+    return SectionPlan(strategy, candidates[strategy], candidates, counts)
+
+def plan_brief(company_id: Optional[str], sections: frozenset, options: BriefOptions) -> Dict[str, SectionPlan]:
+    """A strategy per section to build. The contacts read is planned for engagements too, which share it."""
+    counts = association_counts.peek(company_id, {}) if company_id else {}
+    plans = {}
+    if sections & {"contacts", "engagements"}:
+        n = counts.get("contacts")
+        plans["contacts"] = pick(contacts_costs(n or 0), {"contacts": n}, "associations")
+    if "deals" in sections:
+        in_window, total = deals_in_window(counts, options.deal_lookback_days), counts.get("deals_total")
+        plans["deals"] = pick(
+            deal_costs(in_window or 0, total or 0),
+            {"deals_in_window": in_window, "deals_total": total},
+            "search",
+        )
+    if "engagements" in sections:
+        contacts, calls = counts.get("emailed_contacts"), counts.get("contact_calls")
+        if HUBSPOT_ENGAGEMENT_BACKEND == "v3":
+            candidates = engagement_costs(contacts or 0, calls or 0, options.engagement_limit)
+            plans["engagements"] = pick(candidates, {"emailed_contacts": contacts, "contact_calls": calls}, "associations")._replace(
+                note=CONTACT_CALLS_TRADEOFF,
+            )
+        else:
+            # At least one page per feed; the v1 feeds are drained, so big accounts take more
+            plans["engagements"] = pick({"v1": Cost(other=1 + (contacts or 0))}, {"emailed_contacts": contacts}, "v1")
+    return plans
+
+def explain_brief(email: Optional[str], domain: str, sections: frozenset, options: BriefOptions) -> dict:
+    """What /brief would do for this query, from cached state only: no HubSpot calls are made."""
+    key = brief_cache_key(email, domain, sections, options)
+    cached = brief_cache.peek(key) or brief_cache.peek(brief_cache_key(email, domain, ALL_SECTIONS, options))
+    if cached is None:
+        status = "miss"
+    else:
+        status = "hit" if time.monotonic() - cached.built_at < BRIEF_CACHE_TTL else "stale"
 
-    contacts = get_associated_contacts(cid)
-    deals = get_all_deals_for_company(cid)
-    cw, cl, exp, res, act = [], [], [], [], []
-    for d in deals:
-        st = d.stage.lower()
-        if "closed won" in st: cw.append(d)
-        elif "closed lost" in st: cl.append(d)
-        elif "expansion" in st: exp.append(d)
-        elif "resurrected" in st: res.append(d)
-        else: act.append(d)
+    comp = company_cache.peek(key.domain)
+    company_id = comp["id"] if comp else company_ids.peek(key.domain)
+    lookup = Cost(search=int(bool(key.email) and contact_cache.peek(key.email) is None) + int(comp is None))
+    plans = plan_brief(company_id, sections, options)
+    total = lookup
+    for plan in plans.values():
+        total = total.plus(plan.cost)
+    if "deals" in sections and _stage_map is None:
+        total = total.plus(Cost(other=1))
 
-    engs = get_recent_engagements(cid)
-    formatted = format_engagement_summary(engs)
+    return {
+        "domain": key.domain,
+        "company_id": company_id,
+        "sections": sorted(sections),
+        "options": options._asdict(),
+        # A stale hit is answered from cache but rebuilt behind the response
+        "cache": status,
+        "search_weight": PLANNER_SEARCH_WEIGHT,
+        "plan": {"lookup": lookup.to_dict(), **{name: plan.to_dict() for name, plan in plans.items()}},
+        "predicted_calls": 0 if status == "hit" else total.calls,
+        "predicted_search_calls": 0 if status == "hit" else total.search,
+    }
+
+async def build_brief(
+    email: Optional[str],
+    domain: str,
+    sections: frozenset = ALL_SECTIONS,
+    options: BriefOptions = BriefOptions(),
+) -> BriefResponse:
+    async def lookup_contact() -> ContactInfo:
+        if email:
+            return await get_contact_by_email(email)
+        return ContactInfo(id="", firstname="", lastname="", email="", jobtitle="")
+
+    _loader.set(HubSpotLoader())
+
+    # Only the company id is a real dependency; everything else fans out around it.
+    # Without it there is no brief at all, so a lookup past the deadline fails the request.
+    with phase("lookup"):
+        async with within_deadline():
+            contact, comp = await asyncio.gather(lookup_contact(), get_company_by_domain(domain))
+    cid = comp["id"]
+    company_ids.set(domain.strip().lower(), cid)
+
+    plans = plan_brief(cid, sections, options)
+    log.debug("brief.plan", company_id=cid, **{name: plan.strategy for name, plan in plans.items()})
+    degraded = []
+    resolved = await asyncio.gather(*(
+        brief_section(name, section.resolve(cid, options, plans[name].strategy), {f: [] for f in section.fields}, degraded)
+        for name, section in BRIEF_SECTIONS.items() if name in sections
+    ))
+    fields = {f: v for part in resolved for f, v in part.items()}
 
     return BriefResponse(
         contact=contact,
@@ -355,18 +1286,338 @@ def brief(email: str = Query(None), domain: str = Query(...)):
             industry=comp.get("industry", ""),
             account_status=comp.get("account_status", ""),
             lifecycle_stage=comp.get("lifecycle_stage", ""),
-            contacts=contacts,
-            deals_closed_won=cw,
-            deals_closed_lost=cl,
-            deals_expansion=exp,
-            deals_resurrected=res,
-            deals_active=act,
-            recent_engagements=engs,
-            formatted_engagements_emails=formatted["emails"],
-            formatted_engagements_calls=formatted["calls"]
-        )
+            **fields,
+        ),
+        degraded=sorted(degraded) or None,
     )
 
+class CachedBrief(NamedTuple):
+    built_at: float
+    brief: BriefResponse
+    timings: RequestTimings
+    refs: frozenset  # brief_refs(brief), worked out once: webhook patches never change the ids in it
+
+# Entries outlive the fresh TTL by the stale window, during which they're served while a refresh runs.
+brief_cache = TTLCache(BRIEF_CACHE_SIZE, BRIEF_CACHE_TTL + BRIEF_CACHE_STALE_TTL)
+_brief_builds = {}
+_build_changes: Dict[tuple, set] = {}  # brief key -> refs webhooks changed while its build ran
+
+def note_changes(*refs: tuple):
+    for changed in _build_changes.values():
+        changed.update(refs)
+
+class BriefKey(NamedTuple):
+    email: str
+    domain: str
+    sections: frozenset
+    options: BriefOptions
+
+def brief_cache_key(
+    email: Optional[str],
+    domain: str,
+    sections: frozenset = ALL_SECTIONS,
+    options: BriefOptions = BriefOptions(),
+) -> BriefKey:
+    return BriefKey((email or "").strip().lower(), domain.strip().lower(), sections, options)
+
+def start_brief_build(key: BriefKey, email: Optional[str], domain: str, deadline: float = BRIEF_DEADLINE_SECONDS) -> asyncio.Task:
+    """One build per key at a time; concurrent misses and refreshes share it (and the first caller's deadline)."""
+    task = _brief_builds.get(key)
+    if task is None:
+        changed = _build_changes[key] = set()
+
+        async def run() -> CachedBrief:
+            timings = start_request()
+            start_deadline(deadline)
+            try:
+                built = await build_brief(email, domain, key.sections, key.options)
+                result = CachedBrief(time.monotonic(), built, timings, frozenset(brief_refs(built)))
+                timings.finish()
+                metrics.brief_upstream_calls.observe(timings.calls)
+                # A webhook changed something this brief holds mid-build: the result may predate it,
+                # so don't cache it. Partial briefs aren't cached either; the next request gets a full try.
+                if changed.isdisjoint(result.refs) and not result.brief.degraded:
+                    brief_cache.set(key, result)
+                return result
+            finally:
+                _brief_builds.pop(key, None)
+                _build_changes.pop(key, None)
+        task = _brief_builds[key] = asyncio.create_task(run())
+    return task
+
+def log_refresh_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        log.warning("brief.refresh_failed", error=task.exception())
+
+@app.get("/brief", response_model=BriefResponse)
+async def brief(
+    response: Response,
+    email: str = Query(None),
+    domain: str = Query(...),
+    debug: Optional[str] = Query(None, description="'timing' adds a per-phase breakdown of HubSpot calls"),
+    deadline: Optional[float] = Query(
+        None, gt=0, le=BRIEF_DEADLINE_MAX_SECONDS,
+        description="Seconds to spend before answering with whatever sections are done",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated sections to return: contacts, deals (or deals.closed_won, deals.closed_lost, "
+                    "deals.expansion, deals.resurrected, deals.active), engagements, summaries. Default: all",
+    ),
+    include: Optional[str] = Query(None, description="Alias of fields"),
+    deal_lookback_days: Optional[int] = Query(None, ge=1, le=3650, description=f"Deals closing in the last N days (default {DEAL_LOOKBACK_DAYS})"),
+    engagement_lookback_days: Optional[int] = Query(None, ge=1, le=3650, description="Only emails and calls from the last N days"),
+    engagement_limit: Optional[int] = Query(None, ge=1, le=100, description=f"Recent emails and calls to return (default {ENGAGEMENT_LIMIT})"),
+    summary_limit: Optional[int] = Query(None, ge=0, le=50, description=f"Emails and calls each in the formatted summaries (default {SUMMARY_LIMIT})"),
+    explain: bool = Query(False, description="Return the query plan and predicted HubSpot call count instead of the brief"),
+):
+    started = time.perf_counter()
+    selection = parse_fields(fields, include)
+    sections = selection.sections if selection else ALL_SECTIONS
+    overrides = {
+        "deal_lookback_days": deal_lookback_days,
+        "engagement_lookback_days": engagement_lookback_days,
+        "engagement_limit": engagement_limit,
+        "summary_limit": summary_limit,
+    }
+    options = BriefOptions()._replace(**{k: v for k, v in overrides.items() if v is not None})
+    if explain:
+        return JSONResponse(explain_brief(email, domain, sections, options))
+    status, code = "none", "500"
+    try:
+        with metrics.brief_in_flight.track_inprogress():
+            try:
+                cached, status, age = await get_or_build_brief(email, domain, deadline or BRIEF_DEADLINE_SECONDS, sections, options)
+            except DeadlineExceeded:
+                raise HTTPException(504, "Deadline exceeded before the company was found")
+        code = "200"
+    except HTTPException as exc:
+        code = str(exc.status_code)
+        raise
+    finally:
+        metrics.brief_latency.labels(status, code).observe(time.perf_counter() - started)
+
+    response.headers["Server-Timing"] = cached.timings.server_timing() if status == "miss" else f'cache;desc="{status}";dur=0'
+    response.headers["X-Brief-Cache"] = status
+    response.headers["Age"] = str(int(age))
+    if cached.brief.degraded:
+        response.headers["X-Brief-Degraded"] = ",".join(cached.brief.degraded)
+
+    result = project_brief(cached.brief, selection)
+    if debug and "timing" in debug.split(","):
+        # The breakdown is of the build that produced this brief, which for a hit is an earlier request.
+        timing = {"cache": status, "age_s": round(age, 1), **cached.timings.to_dict()}
+        return result.model_copy(update={"debug": {"timing": timing}})
+    return result
+
+async def get_or_build_brief(
+    email: Optional[str],
+    domain: str,
+    deadline: float = BRIEF_DEADLINE_SECONDS,
+    sections: frozenset = ALL_SECTIONS,
+    options: BriefOptions = BriefOptions(),
+) -> tuple:
+    """(CachedBrief, cache status, age in seconds) for a query, building or refreshing as needed."""
+    key = brief_cache_key(email, domain, sections, options)
+    cached = brief_cache.get(key)
+    if cached is None and sections != ALL_SECTIONS:
+        # A full brief with the same options answers any selection
+        full_key = brief_cache_key(email, domain, ALL_SECTIONS, options)
+        cached = brief_cache.get(full_key)
+        if cached is not None:
+            key = full_key
+    if cached is None:
+        return await asyncio.shield(start_brief_build(key, email, domain, deadline)), "miss", 0.0
+    age = time.monotonic() - cached.built_at
+    if age < BRIEF_CACHE_TTL:
+        return cached, "hit", age
+    # Stale-while-revalidate: answer now, refresh behind the response.
+    start_brief_build(key, email, domain).add_done_callback(log_refresh_failure)
+    return cached, "stale", age
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+metrics.register_state_collector(metrics.StateCollector(
+    upstream_stats=lambda: upstream_stats,
+    cache_stats=lambda: {"contact": contact_cache.stats(), "company": company_cache.stats(), "brief": brief_cache.stats()},
+    scheduler_stats=scheduler.stats,
+))
+
+# —— Webhooks ——
+
+COMPANY_PROPERTY_FIELDS = {
+    "name": "name",
+    "website": "website",
+    "industry": "industry",
+    "lifecyclestage": "lifecycle_stage",
+    "2025_account_status": "account_status",
+}
+CONTACT_PROPERTY_FIELDS = {"firstname", "lastname", "jobtitle"}
+
+def ref(object_type: str, object_id) -> tuple:
+    return ("engagement" if object_type in ENGAGEMENT_TYPES else object_type, str(object_id))
+
+def brief_refs(b: BriefResponse) -> set:
+    c = b.company
+    refs = {ref("company", c.id), ref("contact", b.contact.id)}
+    # ("section", name) for each section the brief holds, for changes that can't be pinned to a company
+    refs.update(("section", name) for name, section in BRIEF_SECTIONS.items() if getattr(c, section.fields[0]) is not None)
+    refs.update(ref("contact", x.id) for x in c.contacts or [])
+    refs.update(ref("deal", d.id) for bucket in DEAL_BUCKETS for d in getattr(c, bucket) or [])
+    refs.update(ref("engagement", e.id) for e in c.recent_engagements or [])
+    return refs
+
+def cached_briefs_referencing(*refs: tuple) -> List[tuple]:
+    return [(k, v) for k, v in brief_cache.items() if not v.refs.isdisjoint(refs)]
+
+def drop_briefs(*refs: tuple) -> int:
+    note_changes(*refs)
+    hits = cached_briefs_referencing(*refs)
+    for key, _ in hits:
+        brief_cache.pop(key)
+    return len(hits)
+
+def patch_company(company_id: str, action: str, event: dict):
+    field = COMPANY_PROPERTY_FIELDS.get(event.get("propertyName"))
+    if action != "propertyChange" or field is None:
+        # domain change, deletion, merge...: forget the record and every brief built on it
+        for key, comp in company_cache.items():
+            if comp["id"] == company_id:
+                company_cache.pop(key)
+        drop_briefs(ref("company", company_id))
+        return
+    value = event.get("propertyValue") or ""
+    for _, comp in company_cache.items():
+        if comp["id"] == company_id:
+            comp[field] = value
+    for _, cached in cached_briefs_referencing(ref("company", company_id)):
+        setattr(cached.brief.company, field, value)
+
+def patch_contact(contact_id: str, action: str, event: dict):
+    prop = event.get("propertyName")
+    if action != "propertyChange" or prop not in CONTACT_PROPERTY_FIELDS:
+        # An email change can move the contact in or out of the brief's email-present filter.
+        # Briefs holding it are dropped here; ones it may join are found by drop_briefs_it_may_join.
+        for key, contact in contact_cache.items():
+            if contact.id == contact_id:
+                contact_cache.pop(key)
+        drop_briefs(ref("contact", contact_id))
+        return
+    value = event.get("propertyValue") or ""
+    for _, contact in contact_cache.items():
+        if contact.id == contact_id:
+            setattr(contact, prop, value)
+    for _, cached in cached_briefs_referencing(ref("contact", contact_id)):
+        for contact in [cached.brief.contact, *(cached.brief.company.contacts or [])]:
+            if contact.id == contact_id:
+                setattr(contact, prop, value)
+
+def patch_deal(deal_id: str, action: str, event: dict):
+    prop, value = event.get("propertyName"), event.get("propertyValue")
+    if action != "propertyChange" or prop not in ("dealname", "amount", "dealstage"):
+        # A new closedate can take the deal out of a brief's lookback window (or bring it in,
+        # see drop_briefs_it_may_join), and each brief has its own window: drop rather than patch.
+        drop_briefs(ref("deal", deal_id))
+        return
+    for _, cached in cached_briefs_referencing(ref("deal", deal_id)):
+        company = cached.brief.company
+        for bucket in DEAL_BUCKETS:
+            for deal in getattr(company, bucket):
+                if deal.id != deal_id:
+                    continue
+                if prop == "dealname":
+                    deal.name = value or ""
+                elif prop == "amount":
+                    deal.amount = parse_amount(value or "0")
+                else:
+                    deal.stage = (_stage_map or {}).get(value, value)
+                    target = classify_stage(value)
+                    if target != bucket:
+                        getattr(company, bucket).remove(deal)
+                        getattr(company, target).append(deal)
+                break
+
+# Objects that can join a brief that doesn't hold them yet, when created or when a property the
+# brief filters on changes: the section they land in, and for the ones whose associations can
+# be read, their v4 type and the (v4 type, ref type) pairs leading to a brief.
+JOINING_SECTIONS = {"contact": "contacts", "deal": "deals", "call": "engagements", "email": "engagements", "engagement": "engagements"}
+TO_COMPANIES, TO_CONTACTS = ("companies", "company"), ("contacts", "contact")
+JOINING_PROPERTIES = {"contact": "email", "deal": "closedate"}
+JOINING_ASSOCIATIONS = {
+    "contact": ("contacts", (TO_COMPANIES,)),
+    "deal": ("deals", (TO_COMPANIES,)),
+    "call": ("calls", (TO_COMPANIES, TO_CONTACTS)),
+    "email": ("emails", (TO_COMPANIES, TO_CONTACTS)),
+}
+
+def may_join_briefs(kind: str, event: dict) -> bool:
+    if kind not in JOINING_SECTIONS:
+        return False
+    action = event_action(event)
+    return action == "creation" or (action == "propertyChange" and event.get("propertyName") == JOINING_PROPERTIES.get(kind))
+
+async def drop_briefs_it_may_join(kind: str, object_id: str):
+    """A new object, or one that now passes a brief's filters (a contact gaining an email,
+    a deal's closedate moving into the window), belongs in the briefs of the companies and
+    contacts it's associated with.
+
+    Its associations are read from HubSpot; if they can't be, every brief with
+    the section it would land in is dropped instead. Links made later arrive as
+    associationChange events.
+    """
+    section = ("section", JOINING_SECTIONS[kind])
+    if not cached_briefs_referencing(section):
+        return
+    if kind not in JOINING_ASSOCIATIONS:
+        drop_briefs(section)
+        return
+    object_type, targets = JOINING_ASSOCIATIONS[kind]
+    try:
+        found = await asyncio.gather(*(get_associated_ids(object_type, [object_id], to_type) for to_type, _ in targets))
+    except Exception as exc:
+        log.warning("webhook.association_lookup_failed", object_type=kind, object_id=object_id, error=exc)
+        drop_briefs(section)
+        return
+    drop_briefs(*(ref(ref_type, i) for (_, ref_type), ids in zip(targets, found) for i in ids[object_id]))
+
+def apply_webhook_event(event: dict):
+    kind, action = event_object_type(event), event_action(event)
+    object_id = str(event.get("objectId"))
+    note_changes(ref(kind, object_id))
+    if action == "associationChange":
+        to_type = str(event.get("associationType", "")).split("_TO_")[-1].lower()
+        drop_briefs(ref(kind, event.get("fromObjectId")), ref(to_type, event.get("toObjectId")))
+    elif kind == "company":
+        patch_company(object_id, action, event)
+    elif kind == "contact":
+        patch_contact(object_id, action, event)
+    elif kind == "deal":
+        patch_deal(object_id, action, event)
+    elif kind in ENGAGEMENT_TYPES:
+        drop_briefs(ref(kind, object_id))
+
+@app.post("/webhooks/hubspot", include_in_schema=False)
+async def hubspot_webhook(request: Request, background: BackgroundTasks):
+    body = await request.body()
+    uri = f"{WEBHOOK_PUBLIC_URL}{request.url.path}" if WEBHOOK_PUBLIC_URL else str(request.url)
+    if not verify_signature(HUBSPOT_CLIENT_SECRET, request.method, uri, body, request.headers):
+        raise HTTPException(401, "Invalid HubSpot signature")
+    try:
+        events = json.loads(body or b"[]")
+    except ValueError:
+        raise HTTPException(400, "Webhook body is not JSON")
+    if not isinstance(events, list):
+        raise HTTPException(400, "Webhook body must be a list of events")
+    for event in events:
+        apply_webhook_event(event)
+        kind = event_object_type(event)
+        if may_join_briefs(kind, event):
+            # Answered first: HubSpot retries webhooks that are slow to respond
+            background.add_task(drop_briefs_it_may_join, kind, str(event.get("objectId")))
+    return {"processed": len(events)}
+
 @app.get("/.well-known/ai-plugin.json")
 def serve_manifest():
     return {
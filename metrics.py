@@ -0,0 +1,97 @@
+"""Prometheus metrics for /brief and its upstream HubSpot traffic.
+
+Hot-path metrics are plain prometheus_client histograms/counters/gauges (a lock
+and an add per observation). Everything that already lives in in-process
+counters (cache stats, retry/hedge counts, rate-limit buckets) is read only at
+scrape time by ``StateCollector``, so it costs nothing between scrapes.
+"""
+from typing import Callable, Iterable
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+brief_latency = Histogram(
+    "brief_request_seconds",
+    "Wall time of /brief requests, failed ones included (cache=\"none\" when no brief was served).",
+    ["cache", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+brief_in_flight = Gauge("brief_requests_in_flight", "/brief requests currently being served.")
+brief_upstream_calls = Histogram(
+    "brief_upstream_calls",
+    "HubSpot calls made to build one brief.",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000),
+)
+brief_degraded_sections = Counter(
+    "brief_degraded_sections_total",
+    "Brief sections returned empty because the request deadline ran out.",
+    ["section"],
+)
+hubspot_latency = Histogram(
+    "hubspot_request_seconds",
+    "Latency of HubSpot calls including pacing, retries and hedges, by endpoint family.",
+    ["family"],
+    buckets=LATENCY_BUCKETS,
+)
+hubspot_in_flight = Gauge("hubspot_requests_in_flight", "HubSpot calls currently outstanding.")
+hubspot_throttled = Counter("hubspot_throttled_total", "429 responses received from HubSpot.", ["family"])
+
+
+class StateCollector:
+    """Exposes counters kept elsewhere in the process, read at scrape time."""
+
+    def __init__(
+        self,
+        upstream_stats: Callable[[], dict],
+        cache_stats: Callable[[], dict],
+        scheduler_stats: Callable[[], dict],
+    ):
+        self.upstream_stats = upstream_stats
+        self.cache_stats = cache_stats
+        self.scheduler_stats = scheduler_stats
+
+    def collect(self) -> Iterable:
+        events = CounterMetricFamily(
+            "hubspot_resilience_events",
+            "Retries, hedges, hedge wins and transport errors per endpoint family.",
+            labels=["family", "event"],
+        )
+        for family, counter in self.upstream_stats().items():
+            for event in ("retries", "hedges", "hedge_wins", "transport_errors"):
+                events.add_metric([family, event], counter.get(event, 0))
+        yield events
+
+        hits = CounterMetricFamily("cache_hits", "Cache hits.", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses.", labels=["cache"])
+        negative = CounterMetricFamily("cache_negative_hits", "Hits on negative-cached lookups.", labels=["cache"])
+        evictions = CounterMetricFamily("cache_evictions", "LRU evictions.", labels=["cache"])
+        size = GaugeMetricFamily("cache_entries", "Entries currently held.", labels=["cache"])
+        for name, stats in self.cache_stats().items():
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            negative.add_metric([name], stats["negative_hits"])
+            evictions.add_metric([name], stats["evictions"])
+            size.add_metric([name], stats["size"])
+        yield from (hits, misses, negative, evictions, size)
+
+        sched = self.scheduler_stats()
+        tokens = GaugeMetricFamily("hubspot_ratelimit_tokens", "Tokens left in each rate-limit bucket.", labels=["bucket"])
+        capacity = GaugeMetricFamily("hubspot_ratelimit_capacity", "Capacity of each rate-limit bucket.", labels=["bucket"])
+        waiting = GaugeMetricFamily("hubspot_ratelimit_waiting", "Calls queued on each bucket.", labels=["bucket"])
+        for bucket in ("general", "search"):
+            tokens.add_metric([bucket], sched[f"{bucket}_tokens"])
+            capacity.add_metric([bucket], sched[f"{bucket}_capacity"])
+            waiting.add_metric([bucket], sched[f"{bucket}_waiting"])
+        yield from (tokens, capacity, waiting)
+        if sched.get("daily_remaining") is not None:
+            yield GaugeMetricFamily(
+                "hubspot_ratelimit_daily_remaining",
+                "Daily HubSpot calls left, per the last response headers.",
+                value=sched["daily_remaining"],
+            )
+
+
+def register_state_collector(collector: StateCollector):
+    REGISTRY.register(collector)
@@ -0,0 +1,162 @@
+"""Client-side pacing for HubSpot's rate limits.
+
+HubSpot enforces a rolling per-10-second limit and a daily limit per token (reported
+back in ``X-HubSpot-RateLimit-*`` headers), plus a separate, much smaller per-second
+limit for the CRM search endpoints. The scheduler keeps a token bucket for each,
+queues callers until a token is free, and backs off on 429 using ``Retry-After``
+instead of surfacing the error.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+
+class TokenBucket:
+    """``capacity`` requests per ``interval`` seconds, refilled continuously. Waiters are served FIFO."""
+
+    def __init__(self, name: str, capacity: float, interval: float, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.capacity = capacity
+        self.interval = interval
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+        self.paused_until = 0.0
+        self.waiting = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.interval
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _queue(self) -> asyncio.Lock:
+        # Locks bind to the loop they first wait on; tests and reloads can run several loops.
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        return self._lock
+
+    async def acquire(self):
+        self.waiting += 1
+        try:
+            async with self._queue():
+                while True:
+                    self._refill()
+                    delay = self.paused_until - self.clock()
+                    if delay <= 0 and self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    await asyncio.sleep(max(delay, (1 - self.tokens) / self.rate))
+        finally:
+            self.waiting -= 1
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for ``seconds`` (e.g. after a 429)."""
+        self._refill()
+        self.tokens = 0
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    def observe(self, limit: Optional[int], remaining: Optional[int], interval_ms: Optional[int]):
+        """Sync with what the server says is left in the current window."""
+        if limit and interval_ms:
+            self.capacity, self.interval = float(limit), interval_ms / 1000.0
+        if remaining is not None:
+            self._refill()
+            self.tokens = min(self.tokens, float(remaining))
+
+
+def _int_header(headers, name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def retry_after_seconds(response: httpx.Response, default: float) -> float:
+    value = response.headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else default
+    except ValueError:
+        return default
+
+
+class HubSpotScheduler:
+    def __init__(
+        self,
+        general: TokenBucket,
+        search: TokenBucket,
+        max_throttle_retries: int = 5,
+        on_throttle: Callable[[str], None] = lambda path: None,
+    ):
+        self.general = general
+        self.search = search
+        self.max_throttle_retries = max_throttle_retries
+        self.on_throttle = on_throttle
+        self.throttled = 0
+        self.daily_limit: Optional[int] = None
+        self.daily_remaining: Optional[int] = None
+
+    def bucket_for(self, path: str) -> TokenBucket:
+        return self.search if path.rstrip("/").endswith("/search") else self.general
+
+    def observe(self, response: httpx.Response):
+        # The headers always describe the per-10-second policy; search has no headers of its own.
+        h = response.headers
+        self.general.observe(
+            _int_header(h, "X-HubSpot-RateLimit-Max"),
+            _int_header(h, "X-HubSpot-RateLimit-Remaining"),
+            _int_header(h, "X-HubSpot-RateLimit-Interval-Milliseconds"),
+        )
+        daily = _int_header(h, "X-HubSpot-RateLimit-Daily")
+        daily_remaining = _int_header(h, "X-HubSpot-RateLimit-Daily-Remaining")
+        if daily is not None:
+            self.daily_limit = daily
+        if daily_remaining is not None:
+            self.daily_remaining = daily_remaining
+
+    async def send(self, path: str, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Run ``send()`` when the path's bucket allows it; wait out 429s up to ``max_throttle_retries`` times."""
+        bucket = self.bucket_for(path)
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            response = await send()
+            self.observe(response)
+            if response.status_code != 429:
+                return response
+            self.throttled += 1
+            self.on_throttle(path)
+            # A spent daily quota won't come back within a request's lifetime; let the caller fail.
+            if attempt >= self.max_throttle_retries or self._daily_exhausted(response):
+                return response
+            attempt += 1
+            bucket.pause(retry_after_seconds(response, default=bucket.interval / 10 * attempt))
+
+    def _daily_exhausted(self, response: httpx.Response) -> bool:
+        if self.daily_remaining == 0:
+            return True
+        try:
+            return response.json().get("policyName") == "DAILY"
+        except ValueError:
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "throttled": self.throttled,
+            "daily_limit": self.daily_limit,
+            "daily_remaining": self.daily_remaining,
+            **{
+                f"{b.name}_{k}": v
+                for b in (self.general, self.search)
+                for k, v in (("tokens", round(b.tokens, 2)), ("capacity", b.capacity), ("waiting", b.waiting))
+            },
+        }
@@ -0,0 +1,130 @@
+"""Retries and hedged requests for idempotent HubSpot reads.
+
+A retry re-issues a read that failed with a transport error or a retryable
+status, after an exponentially growing delay with full jitter. A hedge fires a
+duplicate of a read that is still running past the family's recent latency
+percentile; whichever copy answers first wins and the other is cancelled.
+"""
+import asyncio
+import random
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import httpx
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 2.0
+    retry_statuses: frozenset = frozenset({500, 502, 503, 504})
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter backoff before retry number ``attempt`` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+def parse_statuses(raw: str) -> frozenset:
+    """'5xx|429' -> every 5xx status plus 429. Classes ('4xx', '5xx') and single codes, '|'-separated."""
+    statuses = set()
+    for part in (p.strip().lower() for p in raw.split("|") if p.strip()):
+        if part.endswith("xx"):
+            base = int(part[0]) * 100
+            statuses.update(range(base, base + 100))
+        else:
+            statuses.add(int(part))
+    return frozenset(statuses)
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    enabled: bool = False
+    percentile: float = 0.95
+    min_samples: int = 20
+    min_delay: float = 0.05
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies (seconds) for one endpoint family."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _timed(attempt: Callable[[], Awaitable[httpx.Response]], tracker: LatencyTracker) -> httpx.Response:
+    started = time.perf_counter()
+    response = await attempt()
+    tracker.record(time.perf_counter() - started)
+    return response
+
+
+async def hedged(
+    attempt: Callable[[], Awaitable[httpx.Response]],
+    policy: HedgePolicy,
+    tracker: LatencyTracker,
+    stats: Counter,
+) -> httpx.Response:
+    if not policy.enabled or len(tracker.samples) < policy.min_samples:
+        return await _timed(attempt, tracker)
+
+    threshold = max(policy.min_delay, tracker.percentile(policy.percentile))
+    primary = asyncio.ensure_future(_timed(attempt, tracker))
+    backup = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=threshold)
+        if done:
+            return primary.result()
+
+        stats["hedges"] += 1
+        backup = asyncio.ensure_future(_timed(attempt, tracker))
+        pending = {primary, backup}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                # A copy that failed only loses if the other one can still answer.
+                if task.exception() is None or not pending:
+                    if task is backup:
+                        stats["hedge_wins"] += 1
+                    return task.result()
+    finally:
+        # Also reached when the caller is cancelled (e.g. by its deadline) mid-wait:
+        # no copy may keep running, holding a connection and a rate-limit token.
+        for task in (primary, backup):
+            if task is not None:
+                task.cancel()
+
+
+async def resilient_call(
+    attempt: Callable[[], Awaitable[httpx.Response]],
+    retry: RetryPolicy,
+    hedge: HedgePolicy,
+    tracker: LatencyTracker,
+    stats: Counter,
+) -> httpx.Response:
+    """Run ``attempt`` with hedging, retrying transport errors and retryable statuses per ``retry``."""
+    for n in range(retry.max_attempts):
+        last = n + 1 >= retry.max_attempts
+        try:
+            response = await hedged(attempt, hedge, tracker, stats)
+        except httpx.TransportError:
+            stats["transport_errors"] += 1
+            if last:
+                raise
+        else:
+            if response.status_code not in retry.retry_statuses or last:
+                return response
+        stats["retries"] += 1
+        await asyncio.sleep(retry.delay(n))
@@ -0,0 +1,40 @@
+"""Deal search against the fake HubSpot portal, past HubSpot's 10k search cap."""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import fake_hubspot
+import main
+
+SHAPE = fake_hubspot.AccountShape(contacts=2, engagements=0, deals=0, domain="acme.example")
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def portal():
+    portal = fake_hubspot.build_portal(SHAPE)
+    main.hubspot = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_hubspot.create_app(SHAPE, portal=portal)), base_url="http://fake-hubspot")
+    main.association_counts.clear()
+    return portal
+
+
+def add_deals(portal, count: int, first_close_ms: int, step_ms: int):
+    for i in range(count):
+        deal_id = str(3_500_000 + len(portal.objects["deals"]))
+        portal.add("deals", deal_id, {"dealname": f"Deal {i}", "amount": "100", "dealstage": "closedwon", "closedate": fake_hubspot._iso(first_close_ms + i * step_ms)})
+        portal.associate("deals", deal_id, "companies", SHAPE.company_id)
+
+
+async def test_search_returns_more_than_ten_thousand_future_deals(portal):
+    add_deals(portal, 10_050, int(time.time() * 1000) + fake_hubspot.DAY_MS, 60_000)
+    records = await asyncio.wait_for(main.fetch_deal_search(SHAPE.company_id, 30), 30)
+    assert len({r["id"] for r in records}) == len(records) == 10_050
+
@@ -0,0 +1,32 @@
+"""Engagement feeds against the fake HubSpot portal."""
+import httpx
+import pytest
+
+import fake_hubspot
+import main
+
+SHAPE = fake_hubspot.AccountShape(contacts=4, engagements=20, deals=0, domain="acme.example")
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def portal():
+    portal = fake_hubspot.build_portal(SHAPE)
+    main.hubspot = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_hubspot.create_app(SHAPE, portal=portal)), base_url="http://fake-hubspot")
+    for cache in (main.association_counts, main.company_ids):
+        cache.clear()
+    return portal
+
+
+async def test_contact_calls_skip_associated_calls_that_cannot_be_read(portal):
+    contact_ids = list(portal.objects["contacts"])
+    portal.associate("calls", "9000001", "contacts", contact_ids[0])  # the call itself isn't readable
+    calls = [e async for e in main.contact_calls_feed(SHAPE.company_id, contact_ids, 100, None)]
+    readable = {i for c in contact_ids for i in portal.associated("contacts", c, "calls") if i in portal.objects["calls"]}
+    assert readable and {c["engagement"]["id"] for c in calls} == readable
@@ -0,0 +1,187 @@
+"""Webhook receiver against briefs built from the fake HubSpot portal.
+
+Events are generated and signed with webhooks.make_webhook_request, the same
+way HubSpot sends them.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import fake_hubspot
+import main
+from webhooks import make_association_event, make_event, make_webhook_request, sign_v3
+
+SHAPE = fake_hubspot.AccountShape(contacts=8, engagements=120, deals=12, domain="acme.example")
+SECRET = main.HUBSPOT_CLIENT_SECRET
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def portal():
+    portal = fake_hubspot.build_portal(SHAPE)
+    fake = fake_hubspot.create_app(SHAPE, fake_hubspot.Faults(latency_ms=5), portal=portal)
+    main.hubspot = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake-hubspot")
+    for cache in (main.brief_cache, main.contact_cache, main.company_cache, main.association_counts, main.company_ids):
+        cache.clear()
+    return portal
+
+
+@pytest.fixture
+async def client(portal):
+    await main.refresh_stage_label_map()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://testserver") as c:
+        yield c
+
+
+def contact_email(portal) -> str:
+    return next(c["properties"]["email"] for c in portal.objects["contacts"].values() if c["properties"]["email"])
+
+
+async def get_brief(client, portal) -> httpx.Response:
+    response = await client.get("/brief", params={"email": contact_email(portal), "domain": SHAPE.domain})
+    response.raise_for_status()
+    return response
+
+
+async def post_events(client, *events, secret: str = SECRET, **kwargs) -> httpx.Response:
+    body, headers = make_webhook_request(list(events), secret, **kwargs)
+    return await client.post("/webhooks/hubspot", content=body, headers=headers)
+
+
+async def test_rejects_bad_signatures(client):
+    event = make_event("company.propertyChange", SHAPE.company_id, "name", "Evil Inc")
+    assert (await post_events(client, event, secret="wrong")).status_code == 401
+    assert (await post_events(client, event, timestamp_ms=1)).status_code == 401
+    unsigned = await client.post("/webhooks/hubspot", json=[event])
+    assert unsigned.status_code == 401
+
+
+async def test_rejects_signed_body_that_is_not_json(client):
+    body, timestamp = b"not json", str(int(time.time() * 1000))
+    headers = {
+        "X-HubSpot-Request-Timestamp": timestamp,
+        "X-HubSpot-Signature-v3": sign_v3(SECRET, "POST", "http://testserver/webhooks/hubspot", body, timestamp),
+    }
+    response = await client.post("/webhooks/hubspot", content=body, headers=headers)
+    assert response.status_code == 400
+
+
+async def test_company_property_change_patches_cached_brief(client, portal):
+    await get_brief(client, portal)
+    response = await post_events(client, make_event("company.propertyChange", SHAPE.company_id, "name", "Renamed Inc"))
+    assert response.json() == {"processed": 1}
+
+    brief = await get_brief(client, portal)
+    assert brief.headers["X-Brief-Cache"] == "hit"
+    assert brief.json()["company"]["name"] == "Renamed Inc"
+
+
+async def test_contact_property_change_patches_cached_brief(client, portal):
+    contact_id = (await get_brief(client, portal)).json()["company"]["contacts"][0]["id"]
+    await post_events(client, make_event("contact.propertyChange", contact_id, "jobtitle", "CEO"))
+
+    brief = await get_brief(client, portal)
+    assert brief.headers["X-Brief-Cache"] == "hit"
+    contact = next(c for c in brief.json()["company"]["contacts"] if c["id"] == contact_id)
+    assert contact["jobtitle"] == "CEO"
+
+
+async def test_deal_stage_change_moves_deal_between_buckets(client, portal):
+    company = (await get_brief(client, portal)).json()["company"]
+    deal_id = next(d["id"] for d in company["deals_active"])
+    await post_events(client, make_event("deal.propertyChange", deal_id, "dealstage", "closedwon"))
+
+    brief = await get_brief(client, portal)
+    assert brief.headers["X-Brief-Cache"] == "hit"
+    company = brief.json()["company"]
+    assert deal_id not in [d["id"] for d in company["deals_active"]]
+    won = next(d for d in company["deals_closed_won"] if d["id"] == deal_id)
+    assert won["stage"] == "Closed Won"
+
+
+async def test_deletion_drops_briefs_holding_the_object(client, portal):
+    company = (await get_brief(client, portal)).json()["company"]
+    deal_id = next(d["id"] for bucket in main.DEAL_BUCKETS for d in company[bucket])
+    await post_events(client, make_event("deal.deletion", deal_id))
+    assert (await get_brief(client, portal)).headers["X-Brief-Cache"] == "miss"
+
+
+async def test_association_change_drops_briefs_of_either_side(client, portal):
+    await get_brief(client, portal)
+    await post_events(client, make_association_event("contact", 99, "company", SHAPE.company_id))
+    assert (await get_brief(client, portal)).headers["X-Brief-Cache"] == "miss"
+
+
+async def test_created_call_drops_briefs_of_its_contacts_only(client, portal):
+    await get_brief(client, portal)
+    contact_id = next(iter(portal.objects["contacts"]))
+
+    portal.add("calls", "9000001", {"hs_timestamp": "2026-01-01T00:00:00.000Z", "hs_call_title": "Unrelated"})
+    await post_events(client, make_event("object.creation", 9000001, objectTypeId="0-48"))
+    assert (await get_brief(client, portal)).headers["X-Brief-Cache"] == "hit"
+
+    portal.add("calls", "9000002", {"hs_timestamp": "2026-01-01T00:00:00.000Z", "hs_call_title": "New call"})
+    portal.associate("calls", "9000002", "contacts", contact_id)
+    await post_events(client, make_event("object.creation", 9000002, objectTypeId="0-48"))
+    assert (await get_brief(client, portal)).headers["X-Brief-Cache"] == "miss"
+
+
+async def test_created_deal_drops_briefs_of_its_company(client, portal):
+    await get_brief(client, portal)
+    portal.add("deals", "9000003", {"dealname": "New", "amount": "100", "dealstage": "closedwon", "closedate": "2026-01-01T00:00:00.000Z"})
+    portal.associate("deals", "9000003", "companies", SHAPE.company_id)
+    await post_events(client, make_event("deal.creation", 9000003))
+    assert (await get_brief(client, portal)).headers["X-Brief-Cache"] == "miss"
+
+
+async def test_only_related_events_keep_an_in_flight_build_out_of_the_cache(client, portal):
+    key = main.brief_cache_key(contact_email(portal), SHAPE.domain)
+
+    building = asyncio.create_task(get_brief(client, portal))
+    await asyncio.sleep(0.01)
+    await post_events(client, make_event("deal.propertyChange", 1, "amount", "5"))  # another company's deal
+    await building
+    assert main.brief_cache.peek(key) is not None
+
+    main.brief_cache.clear()
+    building = asyncio.create_task(get_brief(client, portal))
+    await asyncio.sleep(0.01)
+    await post_events(client, make_event("company.propertyChange", SHAPE.company_id, "industry", "RETAIL"))
+    await building
+    assert main.brief_cache.peek(key) is None
+
+
+async def test_contact_gaining_an_email_drops_briefs_of_its_company(client, portal):
+    listed = {c["id"] for c in (await get_brief(client, portal)).json()["company"]["contacts"]}
+    contact_id = next(i for i, c in portal.objects["contacts"].items() if not c["properties"]["email"])
+    portal.objects["contacts"][contact_id]["properties"]["email"] = "new@acme.example"
+    await post_events(client, make_event("contact.propertyChange", contact_id, "email", "new@acme.example"))
+
+    brief = await get_brief(client, portal)
+    assert brief.headers["X-Brief-Cache"] == "miss"
+    assert {c["id"] for c in brief.json()["company"]["contacts"]} == listed | {contact_id}
+
+
+def deal_ids(company: dict) -> set:
+    return {d["id"] for bucket in main.DEAL_BUCKETS for d in company[bucket]}
+
+
+async def test_deal_closedate_moving_into_or_out_of_the_window_drops_the_brief(client, portal):
+    now_ms = int(time.time() * 1000)
+    listed = deal_ids((await get_brief(client, portal)).json()["company"])
+    deal_id = next(i for i in portal.objects["deals"] if i not in listed)
+    for close_ms, expected in ((now_ms, listed | {deal_id}), (now_ms - 10 * 365 * fake_hubspot.DAY_MS, listed)):
+        portal.objects["deals"][deal_id]["properties"]["closedate"] = fake_hubspot._iso(close_ms)
+        await post_events(client, make_event("deal.propertyChange", deal_id, "closedate", str(close_ms)))
+
+        brief = await get_brief(client, portal)
+        assert brief.headers["X-Brief-Cache"] == "miss"
+        assert deal_ids(brief.json()["company"]) == expected
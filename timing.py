@@ -0,0 +1,110 @@
+"""Per-request accounting of upstream HubSpot calls, grouped by brief phase.
+
+``phase("deals")`` tags everything awaited inside it (including tasks spawned
+from there, which inherit the context); ``record_call`` adds one upstream call
+to the current request's ``RequestTimings``.
+"""
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+_phase: ContextVar[str] = ContextVar("brief_phase", default="other")
+_timings: ContextVar[Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+
+class PhaseStats:
+    __slots__ = ("calls", "bytes", "upstream_ms", "first_start", "last_end", "families")
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+        self.upstream_ms = 0.0
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+        self.families = defaultdict(int)
+
+    @property
+    def wall_ms(self) -> float:
+        """Span from the phase's first call starting to its last call finishing."""
+        if self.first_start is None:
+            return 0.0
+        return (self.last_end - self.first_start) * 1000
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "bytes": self.bytes,
+            "wall_ms": round(self.wall_ms, 1),
+            "upstream_ms": round(self.upstream_ms, 1),
+            "families": dict(self.families),
+        }
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.phases = defaultdict(PhaseStats)
+
+    def record(self, phase: str, family: str, started: float, ended: float, nbytes: int):
+        stats = self.phases[phase]
+        stats.calls += 1
+        stats.bytes += nbytes
+        stats.upstream_ms += (ended - started) * 1000
+        stats.first_start = started if stats.first_start is None else min(stats.first_start, started)
+        stats.last_end = ended if stats.last_end is None else max(stats.last_end, ended)
+        stats.families[family] += 1
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def total_ms(self) -> float:
+        return ((self.finished or time.perf_counter()) - self.started) * 1000
+
+    @property
+    def calls(self) -> int:
+        return sum(p.calls for p in self.phases.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "total_ms": round(self.total_ms, 1),
+            "calls": self.calls,
+            "bytes": sum(p.bytes for p in self.phases.values()),
+            "phases": {name: p.to_dict() for name, p in self.phases.items()},
+        }
+
+    def server_timing(self) -> str:
+        """Value for the Server-Timing response header."""
+        parts = [f'{name};dur={p.wall_ms:.1f};desc="{p.calls} calls"' for name, p in self.phases.items()]
+        parts.append(f'hubspot;dur={self.total_ms:.1f};desc="{self.calls} calls"')
+        return ", ".join(parts)
+
+
+@contextmanager
+def phase(name: str):
+    token = _phase.set(name)
+    try:
+        yield
+    finally:
+        _phase.reset(token)
+
+
+def start_request() -> RequestTimings:
+    timings = RequestTimings()
+    _timings.set(timings)
+    return timings
+
+
+def record_call(family: str, started: float, ended: float, nbytes: int):
+    timings = _timings.get()
+    if timings is not None:
+        timings.record(_phase.get(), family, started, ended, nbytes)
+
+
+async def in_phase(name: str, awaitable):
+    """Await ``awaitable`` with its upstream calls attributed to ``name``."""
+    with phase(name):
+        return await awaitable
@@ -0,0 +1,133 @@
+"""HubSpot webhook signatures and a local payload generator.
+
+HubSpot signs every webhook request with the app's client secret:
+
+* v3: ``X-HubSpot-Signature-v3`` is base64(HMAC-SHA256(secret, method + uri + body + timestamp)),
+  with the timestamp (ms) in ``X-HubSpot-Request-Timestamp``; requests older than
+  five minutes must be rejected.
+* v1: ``X-HubSpot-Signature`` is hex(SHA-256(secret + body)).
+
+``make_webhook_request`` builds signed payloads the same way, so the receiver can
+be exercised without a live HubSpot portal.
+"""
+import base64
+import hashlib
+import hmac
+import itertools
+import json
+import time
+from typing import List, Optional, Tuple
+
+MAX_SIGNATURE_AGE_MS = 5 * 60 * 1000
+
+# objectTypeId -> object type, for the generic "object.*" subscriptions
+OBJECT_TYPE_IDS = {
+    "0-1": "contact",
+    "0-2": "company",
+    "0-3": "deal",
+    "0-27": "task",
+    "0-46": "note",
+    "0-47": "meeting",
+    "0-48": "call",
+    "0-49": "email",
+}
+ENGAGEMENT_TYPES = {"engagement", "call", "email", "meeting", "note", "task"}
+
+
+def sign_v3(secret: str, method: str, uri: str, body: bytes, timestamp: str) -> str:
+    message = method.encode() + uri.encode() + body + timestamp.encode()
+    return base64.b64encode(hmac.new(secret.encode(), message, hashlib.sha256).digest()).decode()
+
+
+def sign_v1(secret: str, body: bytes) -> str:
+    return hashlib.sha256(secret.encode() + body).hexdigest()
+
+
+def verify_signature(secret: str, method: str, uri: str, body: bytes, headers, now_ms: Optional[int] = None) -> bool:
+    """Check a webhook request's v3 signature, or v1 when no v3 header was sent."""
+    if not secret:
+        return False
+    v3 = headers.get("x-hubspot-signature-v3")
+    if v3:
+        timestamp = headers.get("x-hubspot-request-timestamp", "")
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        if not timestamp.isdigit() or abs(now_ms - int(timestamp)) > MAX_SIGNATURE_AGE_MS:
+            return False
+        return hmac.compare_digest(sign_v3(secret, method, uri, body, timestamp), v3)
+    v1 = headers.get("x-hubspot-signature")
+    if v1:
+        return hmac.compare_digest(sign_v1(secret, body), v1)
+    return False
+
+
+def event_object_type(event: dict) -> str:
+    """'company', 'contact', 'deal', 'call', ... for both classic and generic subscription types."""
+    prefix = event.get("subscriptionType", "").split(".", 1)[0]
+    if prefix == "object":
+        return OBJECT_TYPE_IDS.get(str(event.get("objectTypeId")), "")
+    return prefix
+
+
+def event_action(event: dict) -> str:
+    """'propertyChange', 'creation', 'deletion', 'associationChange', ..."""
+    return event.get("subscriptionType", "").split(".", 1)[-1]
+
+
+# —— Local payload generator ——
+
+_event_ids = itertools.count(1)
+
+
+def make_event(
+    subscription_type: str,
+    object_id,
+    property_name: Optional[str] = None,
+    property_value: Optional[str] = None,
+    portal_id: int = 1,
+    **extra,
+) -> dict:
+    """One event shaped like HubSpot's, e.g. make_event("deal.propertyChange", 42, "amount", "1000")."""
+    event = {
+        "eventId": next(_event_ids),
+        "subscriptionId": 1,
+        "portalId": portal_id,
+        "appId": 1,
+        "occurredAt": int(time.time() * 1000),
+        "subscriptionType": subscription_type,
+        "attemptNumber": 0,
+        "objectId": int(object_id),
+        "changeSource": "CRM",
+    }
+    if property_name is not None:
+        event["propertyName"] = property_name
+        event["propertyValue"] = property_value
+    event.update(extra)
+    return event
+
+
+def make_association_event(from_type: str, from_id, to_type: str, to_id, removed: bool = False) -> dict:
+    return make_event(
+        f"{from_type}.associationChange",
+        from_id,
+        associationType=f"{from_type.upper()}_TO_{to_type.upper()}",
+        fromObjectId=int(from_id),
+        toObjectId=int(to_id),
+        associationRemoved=removed,
+    )
+
+
+def make_webhook_request(
+    events: List[dict],
+    secret: str,
+    uri: str = "http://testserver/webhooks/hubspot",
+    timestamp_ms: Optional[int] = None,
+) -> Tuple[bytes, dict]:
+    """Body and v3-signed headers for POSTing ``events`` to the receiver at ``uri``."""
+    body = json.dumps(events).encode()
+    timestamp = str(int(time.time() * 1000) if timestamp_ms is None else timestamp_ms)
+    headers = {
+        "Content-Type": "application/json",
+        "X-HubSpot-Request-Timestamp": timestamp,
+        "X-HubSpot-Signature-v3": sign_v3(secret, "POST", uri, body, timestamp),
+    }
+    return body, headers